@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = REPO_DIR / 'blogicum'
+
+
+def setup(db_name=None):
+    """Настраивает Django для запуска бенчмарка вне manage.py."""
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_name:
+        settings.DATABASES['default']['NAME'] = db_name
+    # Как в продакшене: без журнала запросов и без отладочных middleware,
+    # которые settings.py добавляет при DEBUG.
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['localhost']
+    # Бенчмарк работает в одном процессе, а общий файловый кэш проекта
+    # смешал бы версии и страницы баз разного размера.
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.MIDDLEWARE = [
+        name for name in settings.MIDDLEWARE
+        if name != 'blog.middleware.QueryBudgetMiddleware'
+    ]
+    django.setup()
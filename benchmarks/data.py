@@ -0,0 +1,93 @@
+"""Синтетические данные для бенчмарков из общего генератора blog.seeding.
+
+Посты и комментарии вставляются сырым executemany — bulk_create на
+миллионе строк тратит больше времени на модели, чем на базу.
+"""
+import random
+from io import StringIO
+
+BATCH = 50_000
+COMMENTS_PER_POST = 2
+MIN_USERS = 100
+POST_COLUMNS = (
+    'title', 'text', 'excerpt', 'pub_date', 'author_id', 'category_id',
+    'location_id', 'is_published', 'is_visible',
+)
+COMMENT_COLUMNS = ('post_id', 'author_id', 'text', 'created_at')
+
+
+def fill(n_posts, seed=0):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from blog.models import Category, Location, Post
+    from blog.seeding import (
+        N_CATEGORIES,
+        N_LOCATIONS,
+        POSTS_PER_USER,
+        category_fields,
+        comment_fields,
+        location_fields,
+        post_fields,
+    )
+
+    rnd = random.Random(seed)
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f'bench_user_{i}', password='!')
+        for i in range(max(n_posts // POSTS_PER_USER, MIN_USERS))
+    )
+    categories = Category.objects.bulk_create(
+        Category(**category_fields(rnd, i, f'bench-{i}'))
+        for i in range(N_CATEGORIES)
+    )
+    locations = Location.objects.bulk_create(
+        Location(**location_fields(i)) for i in range(N_LOCATIONS)
+    )
+
+    now = timezone.now()
+    adapt = connection.ops.adapt_datetimefield_value
+    created_at = adapt(now)
+    post_sql = (
+        f'INSERT INTO blog_post ({", ".join(POST_COLUMNS)}, created_at,'
+        ' image, image_renditions, comment_count)'
+        f' VALUES ({", ".join(["%s"] * (len(POST_COLUMNS) + 4))})'
+    )
+    comment_sql = (
+        f'INSERT INTO blog_comment ({", ".join(COMMENT_COLUMNS)})'
+        f' VALUES ({", ".join(["%s"] * len(COMMENT_COLUMNS))})'
+    )
+
+    def posts(start, stop):
+        for i in range(start, stop):
+            fields = post_fields(rnd, i, now, users, categories, locations)
+            fields['pub_date'] = adapt(fields['pub_date'])
+            yield (
+                *(fields[column] for column in POST_COLUMNS),
+                created_at, '', '[]', 0,
+            )
+
+    def comments(post_ids, start, stop):
+        for i in range(start, stop):
+            fields = comment_fields(rnd, i, now, post_ids, users)
+            fields['created_at'] = adapt(fields['created_at'])
+            yield tuple(fields[column] for column in COMMENT_COLUMNS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, n_posts, BATCH):
+            cursor.executemany(
+                post_sql, posts(start, min(start + BATCH, n_posts))
+            )
+        post_ids = list(Post.objects.values_list('id', flat=True))
+        rnd.shuffle(post_ids)
+        n_comments = n_posts * COMMENTS_PER_POST
+        for start in range(0, n_comments, BATCH):
+            cursor.executemany(
+                comment_sql,
+                comments(post_ids, start, min(start + BATCH, n_comments)),
+            )
+    call_command('recount_comments', stdout=StringIO())
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
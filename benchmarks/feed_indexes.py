@@ -0,0 +1,108 @@
+"""EXPLAIN ленточных запросов до и после составных индексов Post.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.feed_indexes --posts 1000000
+"""
+import argparse
+import time
+from pathlib import Path
+
+from . import _django
+from .data import fill
+
+FEED_INDEXES = (
+    'post_published_feed_idx',
+    'post_category_feed_idx',
+    'post_author_feed_idx',
+)
+
+
+def feed_querysets():
+    from django.db.models import Count
+
+    from blog.models import Category, Post
+    from blog.utils import FEED_ORDERING
+
+    category = (
+        Category.objects.filter(is_published=True)
+        .annotate(total=Count('posts')).order_by('-total').first()
+    )
+    author_id = (
+        Post.objects.values('author').annotate(total=Count('pk'))
+        .order_by('-total').values_list('author', flat=True).first()
+    )
+    feed = Post.objects.for_feed()
+    return {
+        'index': feed.published(),
+        'category_posts': feed.filter(category=category).published(),
+        'profile': feed.filter(author_id=author_id),
+    }, FEED_ORDERING
+
+
+def measure(querysets, ordering, per_page=10):
+    result = {}
+    for name, queryset in querysets.items():
+        page = queryset.order_by(*ordering)[:per_page]
+        started = time.perf_counter()
+        list(page)
+        elapsed = time.perf_counter() - started
+        result[name] = (page.explain(), elapsed)
+    return result
+
+
+def set_feed_indexes(enabled):
+    from django.db import connection
+
+    from blog.models import Post
+
+    indexes = [
+        index for index in Post._meta.indexes if index.name in FEED_INDEXES
+    ]
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+            if enabled:
+                editor.add_index(Post, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument(
+        '--db', default=str(Path('/tmp') / 'blogicum_bench.sqlite3')
+    )
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if args.rebuild and db_path.exists():
+        db_path.unlink()
+    fresh = not db_path.exists()
+    _django.setup(db_path)
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    if fresh:
+        started = time.perf_counter()
+        fill(args.posts)
+        print(
+            f'Создано {args.posts} публикаций'
+            f' за {time.perf_counter() - started:.1f} с'
+        )
+
+    querysets, ordering = feed_querysets()
+    for enabled in (False, True):
+        set_feed_indexes(enabled)
+        title = 'с индексами' if enabled else 'без индексов'
+        print(f'\n=== {title} ===')
+        for name, (plan, elapsed) in measure(querysets, ordering).items():
+            print(f'\n{name}: {elapsed * 1000:.1f} мс')
+            print(plan)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Латентность, число запросов и память ленты и поста на больших данных.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.views --posts 100000 --output report.json
+    python -m benchmarks.views --posts 100000 --baseline report.json
+
+Страницы запрашиваются тестовым клиентом от имени залогиненного
+пользователя, чтобы не мерить попадания в кэш анонимных страниц.
+"""
+import argparse
+import json
+import resource
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from . import _django
+
+PERCENTILES = (50, 95, 99)
+DEEP_PAGE_SHARE = 0.9
+
+
+def scenarios():
+    """{название: URL} для сценариев на заполненной базе."""
+    from django.db.models import Count
+
+    from blog.models import Category, Post
+    from blog.constants import OFFSET_PAGINATION_MAX_PAGE
+    from blog.utils import FEED_ORDERING, encode_cursor
+
+    category = (
+        Category.objects.filter(is_published=True)
+        .annotate(total=Count('posts')).order_by('-total').first()
+    )
+    category_posts = category.posts.published().order_by(*FEED_ORDERING)
+    deep = category_posts[
+        int(category_posts.count() * DEEP_PAGE_SHARE)
+    ]
+    author = (
+        Post.objects.values('author__username').annotate(total=Count('pk'))
+        .order_by('-total').values_list('author__username', flat=True)
+        .first()
+    )
+    post = Post.objects.published().order_by('-comment_count').first()
+    category_url = f'/category/{category.slug}/'
+    return {
+        'index': '/',
+        'category_posts': category_url,
+        'category_posts_last_offset_page': (
+            f'{category_url}?page={OFFSET_PAGINATION_MAX_PAGE}'
+        ),
+        'category_posts_deep_cursor': (
+            f'{category_url}?cursor={encode_cursor("n", deep)}'
+        ),
+        'category_posts_last': f'{category_url}?cursor=last',
+        'profile': f'/profile/{author}/',
+        'post_detail': f'/posts/{post.id}/',
+    }
+
+
+def _client():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(get_user_model().objects.order_by('pk').last())
+    return client
+
+
+def measure(client, url, n_requests, warmup=3):
+    from django.db import connection
+
+    from blog.middleware import QueryStats
+
+    for _ in range(warmup):
+        client.get(url)
+    latencies = []
+    stats = QueryStats()
+    with connection.execute_wrapper(stats):
+        for _ in range(n_requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    result = {'url': url, 'status': response.status_code}
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(quantiles[percent - 1] * 1000, 2)
+    result['queries'] = stats.count / n_requests
+    result['db_ms'] = round(stats.duration / n_requests * 1000, 2)
+    result['peak_memory_kb'] = peak // 1024
+    return result
+
+
+def compare(report, baseline):
+    for name, result in report['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms']
+        print(
+            f'{name}: p95 {before["p95_ms"]} → {result["p95_ms"]} мс'
+            f' ({change:+.0%}), запросов {before["queries"]}'
+            f' → {result["queries"]}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--posts', type=int, default=10_000,
+        help='10000, 100000 или 1000000',
+    )
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--db')
+    parser.add_argument('--rebuild', action='store_true')
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    args = parser.parse_args()
+
+    db_path = Path(
+        args.db or Path('/tmp') / f'blogicum_bench_{args.posts}.sqlite3'
+    )
+    if args.rebuild and db_path.exists():
+        db_path.unlink()
+    fresh = not db_path.exists()
+    _django.setup(db_path)
+
+    from django.core.management import call_command
+
+    from .data import fill
+
+    call_command('migrate', verbosity=0)
+    if fresh:
+        started = time.perf_counter()
+        fill(args.posts)
+        print(
+            f'Создано {args.posts} публикаций'
+            f' за {time.perf_counter() - started:.1f} с'
+        )
+
+    client = _client()
+    report = {'posts': args.posts, 'requests': args.requests, 'scenarios': {}}
+    for name, url in scenarios().items():
+        result = measure(client, url, args.requests)
+        report['scenarios'][name] = result
+        print(
+            f'{name}: p50 {result["p50_ms"]} / p95 {result["p95_ms"]}'
+            f' / p99 {result["p99_ms"]} мс, запросов {result["queries"]},'
+            f' пик памяти {result["peak_memory_kb"]} КБ'
+        )
+    report['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""Подсказки поиска по заголовкам постов, категориям и именам авторов.
+
+Индекс живёт в памяти процесса: отсортированный список ключей, где ключ —
+название с начала каждого слова, и поиск по префиксу бисекцией. Запрос
+подсказок к базе не обращается и индекс не перестраивает.
+
+Записи моделей добавляют в журнал AutocompleteChange новое состояние
+записи, смена видимости категории — ещё и состояние её постов.
+Процесс-автор применяет его к своему индексу сразу после коммита,
+остальные — фоновым потоком, который раз в AUTOCOMPLETE_SYNC_INTERVAL
+секунд читает журнал после последней увиденной записи. Целиком индекс
+строится при первой синхронизации, по записи kind='rebuild' после массовых
+изменений и если процесс отстал дольше, чем журнал хранится.
+
+Без фонового потока (AUTOCOMPLETE_BACKGROUND_SYNC = False — тесты, один
+процесс в разработке) журнал читает сам запрос подсказок, не чаще раза
+в AUTOCOMPLETE_SYNC_INTERVAL секунд. Процессы журнал только читают;
+старые записи удаляет команда prune_autocomplete.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+
+from .constants import (
+    AUTOCOMPLETE_KEY_LENGTH,
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_LOG_TTL,
+    AUTOCOMPLETE_SYNC_INTERVAL,
+)
+from .models import AutocompleteChange, Category, Post
+
+POST = 'post'
+CATEGORY = 'category'
+USER = 'user'
+REBUILD = 'rebuild'
+
+URL_NAMES = {
+    POST: 'blog:post_detail',
+    CATEGORY: 'blog:category_posts',
+    USER: 'blog:profile',
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Entry(NamedTuple):
+    kind: str
+    label: str
+    url_arg: object
+    # Отложенный пост появляется в подсказках сам, без записи в базу.
+    pub_date: object = None
+
+    @property
+    def url(self):
+        # reverse() на каждую запись заметно замедлил бы перестройку.
+        return reverse(URL_NAMES[self.kind], args=[self.url_arg])
+
+
+def _keys(label):
+    label = label.lower()
+    return {
+        label[match.start():match.start() + AUTOCOMPLETE_KEY_LENGTH]
+        for match in re.finditer(r'\w+', label)
+    }
+
+
+def post_entry(post):
+    if not post.is_visible:
+        return None
+    return Entry(
+        POST,
+        post.title,
+        post.pk,
+        post.pub_date,
+    )
+
+
+def category_entry(category):
+    if not category.is_published:
+        return None
+    return Entry(
+        CATEGORY,
+        category.title,
+        category.slug,
+    )
+
+
+def user_entry(user):
+    if not user.is_active:
+        return None
+    return Entry(
+        USER,
+        user.username,
+        user.username,
+    )
+
+
+def _change_entry(change):
+    if change.removed:
+        return None
+    url_arg = change.object_id if change.kind == POST else change.url_arg
+    return Entry(change.kind, change.label, url_arg, change.pub_date)
+
+
+def _change(kind, pk, entry):
+    return AutocompleteChange(
+        kind=kind,
+        object_id=pk,
+        label=entry.label if entry else '',
+        url_arg=str(entry.url_arg) if entry else '',
+        pub_date=entry.pub_date if entry else None,
+        removed=entry is None,
+    )
+
+
+def record(kind, pk, entry):
+    """Пишет новое состояние записи в журнал для всех процессов."""
+    _change(kind, pk, entry).save()
+    transaction.on_commit(lambda: index.apply(kind, pk, entry))
+
+
+def record_many(kind, entries):
+    """Пишет состояния {pk: entry} записей одной вставкой."""
+    if not entries:
+        return
+    AutocompleteChange.objects.bulk_create(
+        _change(kind, pk, entry) for pk, entry in entries.items()
+    )
+    transaction.on_commit(lambda: index.apply_many(kind, entries))
+
+
+def record_rebuild():
+    """Просит все процессы перестроить индекс после массовых изменений."""
+    AutocompleteChange.objects.create(kind=REBUILD)
+    transaction.on_commit(index.request_rebuild)
+
+
+def prune():
+    """Удаляет записи журнала старше AUTOCOMPLETE_LOG_TTL."""
+    deleted, _ = AutocompleteChange.objects.filter(
+        created_at__lt=timezone.now()
+        - timedelta(seconds=AUTOCOMPLETE_LOG_TTL)
+    ).delete()
+    return deleted
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self._seq = None
+        self._synced_at = None
+        self._rebuild_requested = False
+        self._thread = None
+
+    def _remove(self, ref):
+        entry = self._entries.pop(ref, None)
+        if entry is None:
+            return
+        for key in _keys(entry.label):
+            i = bisect.bisect_left(self._keys, (key, *ref))
+            if i < len(self._keys) and self._keys[i] == (key, *ref):
+                del self._keys[i]
+
+    def _put(self, ref, entry):
+        self._remove(ref)
+        if entry is None:
+            return
+        self._entries[ref] = entry
+        for key in _keys(entry.label):
+            bisect.insort(self._keys, (key, *ref))
+
+    def apply(self, kind, pk, entry):
+        """Правит одну запись на месте."""
+        self.apply_many(kind, {pk: entry})
+
+    def apply_many(self, kind, entries):
+        with self._lock:
+            for pk, entry in entries.items():
+                self._put((kind, pk), entry)
+
+    def request_rebuild(self):
+        self._rebuild_requested = True
+
+    def rebuild(self):
+        # Номер берётся до чтения таблиц: изменения, записанные во время
+        # перестройки, применятся следующей синхронизацией поверх.
+        seq = AutocompleteChange.objects.aggregate(seq=Max('pk'))['seq']
+        synced_at = timezone.now()
+        entries = {}
+        posts = Post.objects.filter(is_visible=True).values_list(
+            'pk', 'title', 'pub_date'
+        )
+        for pk, title, pub_date in posts.iterator():
+            entries[POST, pk] = Entry(POST, title, pk, pub_date)
+        categories = Category.objects.filter(is_published=True).values_list(
+            'pk', 'title', 'slug'
+        )
+        for pk, title, slug in categories:
+            entries[CATEGORY, pk] = Entry(CATEGORY, title, slug)
+        users = get_user_model().objects.filter(is_active=True).values_list(
+            'pk', 'username'
+        )
+        for pk, username in users.iterator():
+            entries[USER, pk] = Entry(USER, username, username)
+        keys = sorted(
+            (key, *ref)
+            for ref, entry in entries.items()
+            for key in _keys(entry.label)
+        )
+        with self._lock:
+            self._entries, self._keys = entries, keys
+            self._seq, self._synced_at = seq or 0, synced_at
+
+    def sync(self):
+        """Применяет журнал после последней увиденной записи."""
+        with self._sync_lock:
+            self._sync()
+
+    def _sync(self):
+        if (
+            self._seq is None
+            or self._rebuild_requested
+            # Журнал могли уже почистить: записей за этот срок нет.
+            or timezone.now() - self._synced_at
+            > timedelta(seconds=AUTOCOMPLETE_LOG_TTL / 2)
+        ):
+            self._rebuild_requested = False
+            self.rebuild()
+            return
+        synced_at = timezone.now()
+        changes = list(
+            AutocompleteChange.objects.filter(pk__gt=self._seq).order_by('pk')
+        )
+        if any(change.kind == REBUILD for change in changes):
+            self.rebuild()
+            return
+        with self._lock:
+            for change in changes:
+                self._put(
+                    (change.kind, change.object_id), _change_entry(change)
+                )
+            if changes:
+                self._seq = changes[-1].pk
+            self._synced_at = synced_at
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception('Не удалось обновить индекс подсказок')
+            finally:
+                close_old_connections()
+            time.sleep(AUTOCOMPLETE_SYNC_INTERVAL)
+
+    def start(self):
+        """Запускает фоновую синхронизацию, один раз на процесс."""
+        if not settings.AUTOCOMPLETE_BACKGROUND_SYNC:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='autocomplete-sync', daemon=True
+                )
+                self._thread.start()
+
+    def _is_stale(self):
+        return self._synced_at is None or timezone.now() - self._synced_at > (
+            timedelta(seconds=AUTOCOMPLETE_SYNC_INTERVAL)
+        )
+
+    def lookup(self, query, limit=AUTOCOMPLETE_LIMIT):
+        if settings.AUTOCOMPLETE_BACKGROUND_SYNC:
+            if self._thread is None:
+                self.start()
+        elif self._is_stale():
+            self.sync()
+        prefix = query.strip().lower()[:AUTOCOMPLETE_KEY_LENGTH]
+        if not prefix:
+            return []
+        now = timezone.now()
+        results, seen = [], set()
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and len(results) < limit:
+                key, *ref = self._keys[i]
+                i += 1
+                if not key.startswith(prefix):
+                    break
+                ref = tuple(ref)
+                entry = self._entries[ref]
+                if ref in seen or (entry.pub_date and entry.pub_date > now):
+                    continue
+                seen.add(ref)
+                results.append(entry)
+        return results
+
+
+index = PrefixIndex()
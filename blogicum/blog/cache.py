@@ -0,0 +1,153 @@
+import hashlib
+import uuid
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import schedule
+from .constants import FEED_PAGE_CACHE_TIMEOUT, POST_CARD_CACHE_TIMEOUT
+
+VERSION_KEY = 'blog:version:{}:{}'
+PAGE_KEY = 'blog:page:{}:{}'
+COUNT_KEY = 'blog:count:{}:{}'
+FEED_GENERATION = ('feed', 'all')
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def bump_version(kind, pk):
+    version = _new_version()
+    cache.set(VERSION_KEY.format(kind, pk), version, None)
+    return version
+
+
+def get_versions(pairs):
+    """Версии объектов [(kind, pk), ...] одним обращением к кэшу.
+
+    Пропавшая из кэша версия заменяется новой, а не нулём, чтобы
+    не воскрешать устаревшие фрагменты.
+    """
+    keys = [VERSION_KEY.format(kind, pk) for kind, pk in pairs]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _card_state(post):
+    # Эти столбцы пишут фоновые задачи и команды в других процессах, куда
+    # сброс версии не доходит, поэтому их значения входят в ключ сами.
+    raw = repr((post.image_renditions, post.excerpt, post.comment_count))
+    return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+
+def with_card_versions(page):
+    """Проставляет post.card_version и срок кэша карточки в ленте."""
+    pairs = []
+    for post in page:
+        pairs += [
+            ('post', post.pk),
+            ('category', post.category_id),
+            ('location', post.location_id),
+            ('user', post.author_id),
+        ]
+    versions = iter(get_versions(pairs))
+    for post in page:
+        post.card_version = '.'.join(
+            [next(versions) for _ in range(4)] + [_card_state(post)]
+        )
+        post.card_cache_timeout = POST_CARD_CACHE_TIMEOUT
+    return page
+
+
+def bump_feed_generation():
+    bump_version(*FEED_GENERATION)
+
+
+def _page_timeout(scope=schedule.SITE, key=''):
+    timeout = FEED_PAGE_CACHE_TIMEOUT
+    next_pub_date = schedule.next_publication(scope, key)
+    if next_pub_date is not None:
+        until_next = (next_pub_date - timezone.now()).total_seconds()
+        timeout = min(timeout, int(until_next))
+    return timeout
+
+
+def cached_count(request, compute):
+    """Число постов ленты, общее для запросов до ближайшей записи."""
+    [generation] = get_versions([FEED_GENERATION])
+    user = request.user.pk if request.user.is_authenticated else ''
+    scope_id = f'{request.path}|{user}'
+    key = COUNT_KEY.format(
+        generation, hashlib.md5(scope_id.encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = compute()
+        timeout = _page_timeout(*schedule.scope_for_request(request))
+        if timeout > 0:
+            cache.set(key, count, timeout)
+    return count
+
+
+def _page_id(request):
+    return '|'.join((
+        request.path,
+        request.GET.get('page', ''),
+        request.GET.get('cursor', ''),
+        request.GET.get('comments', ''),
+    ))
+
+
+def page_etag(request, *args, **kwargs):
+    """Валидатор страницы, не требующий запроса ленты.
+
+    Зависит от поколения ленты (его сбрасывает и правка профиля, которую
+    видно на странице автора), ближайшей отложенной публикации (чтобы
+    сменить валидатор в момент её выхода), адреса страницы, пользователя
+    и CSRF-cookie, которая попадает в формы на странице.
+    """
+    [generation] = get_versions([FEED_GENERATION])
+    user = request.user.pk if request.user.is_authenticated else ''
+    raw = '|'.join(map(str, (
+        generation,
+        schedule.next_publication(*schedule.scope_for_request(request)),
+        _page_id(request),
+        user,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_anonymous_page(view):
+    """Кэширует ленту для анонимных GET-запросов.
+
+    Ключ — поколение ленты, путь и номер страницы или курсор; поколение
+    сбрасывается при записи постов, комментариев, категорий, мест и
+    пользователей.
+    Время жизни не превышает срока до ближайшей отложенной публикации.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        [generation] = get_versions([FEED_GENERATION])
+        key = PAGE_KEY.format(
+            generation, hashlib.md5(_page_id(request).encode()).hexdigest()
+        )
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            timeout = _page_timeout(*schedule.scope_for_request(request))
+            if response.status_code == HTTPStatus.OK and timeout > 0:
+                cache.set(key, response, timeout)
+        return response
+    return wrapper
@@ -4,3 +4,36 @@ NAME_MAX_LENGTH = 256
 
 MIN_LENGTH_DESCRIPTION = 10
 MIN_LENGTH_COMMENT = 3
+EXCERPT_WORDS = 10
+
+OFFSET_PAGINATION_MAX_PAGE = 5
+PAGE_LINKS_ON_EACH_SIDE = 2
+COMMENTS_PER_PAGE = 50
+
+FEED_PAGE_CACHE_TIMEOUT = 60 * 5
+# Ключ карточки меняется с версиями, срок лишь убирает забытые фрагменты.
+POST_CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+TIMING_SAMPLES = 1000
+TIMING_PERCENTILES = (50, 95, 99)
+
+PROFILE_QUERY_PARAM = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+SEARCH_MAX_TERMS = 8
+
+AUTOCOMPLETE_KEY_LENGTH = 32
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_SYNC_INTERVAL = 2
+AUTOCOMPLETE_LOG_TTL = 24 * 60 * 60
+
+# Карточка и страница поста шириной 40rem: 1x, 1.5x и 2x.
+IMAGE_RENDITION_WIDTHS = (640, 960, 1280)
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_ORIGINAL_QUALITY = 95
+IMAGE_HASH_CHUNK_SIZE = 64 * 1024
+IMAGE_ORPHAN_GRACE = 60 * 60
+
+IMAGE_JOB_MAX_ATTEMPTS = 5
+IMAGE_JOB_RETRY_DELAY = 30
+IMAGE_JOB_POLL_INTERVAL = 2
@@ -0,0 +1,117 @@
+"""Уменьшенные копии Post.image для srcset.
+
+Копии лежат рядом с оригиналом: posts/photo.jpg → posts/photo.640w.webp.
+Ширины берутся из IMAGE_RENDITION_WIDTHS (карточка, страница поста и их
+2x); изображение не увеличивается, а картинки не шире самой узкой копии
+отдаются как есть. Перед этим из оригинала убираются метаданные (EXIF,
+в том числе геотеги): на него ведут ссылки из карточки и поста.
+"""
+import os
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+from .constants import (
+    IMAGE_ORIGINAL_QUALITY,
+    IMAGE_RENDITION_QUALITY,
+    IMAGE_RENDITION_WIDTHS,
+)
+from .storage import original_name, post_image_storage
+
+
+def rendition_name(name, width):
+    root, _ = os.path.splitext(name)
+    return f'{root}.{width}w.webp'
+
+
+def rendition_widths(original_width):
+    widths = [w for w in IMAGE_RENDITION_WIDTHS if w < original_width]
+    if widths and original_width < IMAGE_RENDITION_WIDTHS[-1]:
+        widths.append(original_width)
+    return widths
+
+
+def make_renditions(storage, name):
+    """Сохраняет копии файла name из storage и возвращает их ширины.
+
+    Метаданные (EXIF, в том числе геотеги) в копии не переносятся.
+    """
+    with storage.open(name, 'rb') as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA')
+        widths = rendition_widths(original.width)
+        for width in widths:
+            height = round(original.height * width / original.width)
+            buffer = BytesIO()
+            original.resize((width, height), Image.LANCZOS).save(
+                buffer, 'WEBP', quality=IMAGE_RENDITION_QUALITY
+            )
+            storage.save_as(
+                rendition_name(name, width), ContentFile(buffer.getvalue())
+            )
+    return widths
+
+
+def strip_metadata(storage, name):
+    """Сохраняет оригинал без метаданных и возвращает его новое имя.
+
+    Файл без EXIF и XMP не перезаписывается. JPEG без поворота
+    пересохраняется с исходными таблицами квантования, без потери
+    качества сверх исходной.
+    """
+    with storage.open(name, 'rb') as file, Image.open(file) as original:
+        exif = original.getexif()
+        if not exif and 'xmp' not in original.info:
+            return name
+        image_format = original.format
+        params = {'save_all': getattr(original, 'is_animated', False)}
+        if exif.get(ExifTags.Base.Orientation, 1) != 1:
+            original = ImageOps.exif_transpose(original)
+            if image_format == 'JPEG':
+                params['quality'] = IMAGE_ORIGINAL_QUALITY
+        elif image_format == 'JPEG':
+            params['quality'] = 'keep'
+        buffer = BytesIO()
+        original.save(buffer, image_format, **params)
+    return storage.save(original_name(name), ContentFile(buffer.getvalue()))
+
+
+def process_image(name):
+    """Точка входа для процесса из пула: (имя оригинала, ширины копий)."""
+    storage = post_image_storage()
+    name = strip_metadata(storage, name)
+    return name, make_renditions(storage, name)
+
+
+def delete_image(name, widths=()):
+    """Удаляет файл и его копии любых ширин.
+
+    Ширина копии может совпадать с шириной оригинала, поэтому копии,
+    не указанные в widths, ищутся в каталоге файла.
+    """
+    storage = post_image_storage()
+    storage.delete(name)
+    directory = os.path.dirname(name)
+    pattern = re.compile(
+        re.escape(os.path.splitext(os.path.basename(name))[0])
+        + r'\.\d+w\.webp'
+    )
+    names = {rendition_name(name, width) for width in widths}
+    if storage.exists(directory):
+        names.update(
+            os.path.join(directory, filename)
+            for filename in storage.listdir(directory)[1]
+            if pattern.fullmatch(filename)
+        )
+    for rendition in names:
+        storage.delete(rendition)
+
+
+def srcset(image, widths):
+    return ', '.join(
+        f'{image.storage.url(rendition_name(image.name, width))} {width}w'
+        for width in widths
+    )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_feed_generation
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает пустые Post.excerpt, а с --all — анонсы всех '
+        'постов, например после смены EXCERPT_WORDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать анонсы всех постов, а не только пустые.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('id', 'text').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(excerpt='')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for post in batch:
+                post.excerpt = Post.make_excerpt(post.text)
+            Post.objects.bulk_update(batch, ['excerpt'])
+            updated += len(batch)
+            last_pk = batch[-1].pk
+
+        if updated:
+            bump_feed_generation()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено анонсов: {updated}'))
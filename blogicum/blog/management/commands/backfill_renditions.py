@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from blog import images
+from blog.cache import bump_feed_generation, bump_version
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Убирает метаданные из Post.image и создаёт уменьшенные копии'
+        ' для постов без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии всех изображений, а не только пустые.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        posts = posts.only('id', 'image', 'image_renditions').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(image_renditions=[])
+
+        updated = missing = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for post in batch:
+                if post.image.storage.exists(post.image.name):
+                    updated += self.process(post)
+                else:
+                    missing += 1
+            last_pk = batch[-1].pk
+
+        if updated:
+            bump_feed_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {updated}, файлов нет: {missing}'
+        ))
+
+    def process(self, post):
+        old_name = post.image.name
+        name, widths = images.process_image(old_name)
+        # Пока файл обрабатывался, автор мог загрузить другой.
+        updated = Post.objects.filter(pk=post.pk, image=old_name).update(
+            image=name, image_renditions=widths
+        )
+        if not updated:
+            Post.release_image(name, widths)
+        if name != old_name:
+            # Файл с метаданными заменён очищенным.
+            Post.release_image(old_name)
+        if updated:
+            bump_version('post', post.pk)
+        return updated
@@ -0,0 +1,51 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.storage import post_image_storage
+
+RENDITION_RE = re.compile(r'\.\d+w\.webp$')
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы Post.image, на которые не ссылается ни один пост,'
+        ' вместе с их копиями.'
+    )
+
+    def handle(self, *args, **options):
+        storage = post_image_storage()
+        upload_to = Post._meta.get_field('image').upload_to
+        deleted = kept = 0
+        for directory, files in self.walk(storage, upload_to):
+            originals = [
+                os.path.join(directory, name) for name in files
+                if not RENDITION_RE.search(name)
+            ]
+            for start in range(0, len(originals), BATCH_SIZE):
+                batch = originals[start:start + BATCH_SIZE]
+                used = set(Post.objects.filter(image__in=batch).values_list(
+                    'image', flat=True
+                ))
+                for name in batch:
+                    if name in used:
+                        continue
+                    # Под блокировкой ссылки и время проверяются ещё раз.
+                    if Post.release_image(name):
+                        deleted += 1
+                    else:
+                        kept += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {deleted}, оставлено недавних: {kept}'
+        ))
+
+    def walk(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        yield directory, files
+        for name in directories:
+            yield from self.walk(storage, os.path.join(directory, name))
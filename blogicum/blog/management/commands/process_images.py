@@ -0,0 +1,137 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from blog import images
+from blog.cache import bump_feed_generation, bump_version
+from blog.constants import (
+    IMAGE_JOB_MAX_ATTEMPTS,
+    IMAGE_JOB_POLL_INTERVAL,
+    IMAGE_JOB_RETRY_DELAY,
+)
+from blog.models import ImageJob, Post
+
+Status = ImageJob.Status
+
+
+def start_pool(workers):
+    """Пул с уже запущенными процессами.
+
+    Соединения закрываются прямо перед fork: иначе процессы, которые пул
+    создаёт при первой задаче, унаследуют соединение, открытое claim().
+    """
+    connections.close_all()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    # С fork первая задача запускает сразу все процессы пула.
+    pool.submit(int).result()
+    return pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт копии загруженных изображений из очереди ImageJob '
+        'в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти, не дожидаясь новых.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=IMAGE_JOB_POLL_INTERVAL
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        # Задачи, брошенные остановленным воркером, возвращаются в очередь.
+        ImageJob.objects.filter(status=Status.RUNNING).update(
+            status=Status.PENDING
+        )
+        pool = start_pool(workers)
+        try:
+            while True:
+                jobs = self.claim(workers * 2)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                futures = {
+                    pool.submit(images.process_image, job.image_name): job
+                    for job in jobs
+                }
+                broken = False
+                for future in as_completed(futures):
+                    try:
+                        name, widths = future.result()
+                    except BrokenProcessPool as error:
+                        broken = True
+                        self.retry(futures[future], error)
+                    except Exception as error:
+                        self.retry(futures[future], error)
+                    else:
+                        self.finish(futures[future], name, widths)
+                if broken:
+                    pool.shutdown(cancel_futures=True)
+                    pool = start_pool(workers)
+        finally:
+            pool.shutdown()
+
+    def claim(self, limit):
+        ready = ImageJob.objects.filter(
+            status=Status.PENDING, run_after__lte=timezone.now()
+        ).order_by('run_after')[:limit]
+        claimed = []
+        for job in ready:
+            # Условный UPDATE не даёт двум воркерам взять одну задачу.
+            if ImageJob.objects.filter(
+                pk=job.pk, status=Status.PENDING
+            ).update(status=Status.RUNNING):
+                claimed.append(job)
+        return claimed
+
+    def finish(self, job, name, widths):
+        with transaction.atomic():
+            # Пока файл обрабатывался, автор мог загрузить другой.
+            updated = Post.objects.filter(
+                pk=job.post_id, image=job.image_name
+            ).update(image=name, image_renditions=widths)
+            ImageJob.objects.filter(pk=job.pk).delete()
+        if not updated:
+            # Очищенный файл и копии больше никому не нужны.
+            Post.release_image(name, widths)
+        if name != job.image_name:
+            # Файл с метаданными заменён очищенным.
+            Post.release_image(job.image_name)
+        if updated:
+            bump_version('post', job.post_id)
+            bump_feed_generation()
+        self.stdout.write(f'{name}: {widths or "без копий"}')
+
+    def retry(self, job, error):
+        attempts = job.attempts + 1
+        if attempts >= IMAGE_JOB_MAX_ATTEMPTS:
+            status, run_after = Status.FAILED, job.run_after
+        else:
+            status = Status.PENDING
+            run_after = timezone.now() + timedelta(
+                seconds=IMAGE_JOB_RETRY_DELAY * 2 ** (attempts - 1)
+            )
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=status,
+            attempts=attempts,
+            error=repr(error),
+            run_after=run_after,
+        )
+        self.stderr.write(f'{job.image_name}: {error!r}')
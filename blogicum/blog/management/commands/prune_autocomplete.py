@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog import autocomplete
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из журнала подсказок записи старше AUTOCOMPLETE_LOG_TTL.'
+        ' Запускается по расписанию, например раз в час.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = autocomplete.prune()
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено записей журнала: {deleted}')
+        )
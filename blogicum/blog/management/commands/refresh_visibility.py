@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog import autocomplete
+from blog.cache import bump_feed_generation
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает флаг Post.is_visible по публикации и категории.'
+
+    def handle(self, *args, **options):
+        hidden = Post.objects.filter(
+            Q(is_published=False)
+            | Q(category__isnull=True)
+            | Q(category__is_published=False)
+        )
+        unhidden = Post.objects.filter(
+            is_published=True, category__is_published=True
+        )
+        updated = (
+            hidden.filter(is_visible=True).update(is_visible=False)
+            + unhidden.filter(is_visible=False).update(is_visible=True)
+        )
+        autocomplete.record_rebuild()
+        if updated:
+            bump_feed_generation()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено флагов видимости: {updated}')
+        )
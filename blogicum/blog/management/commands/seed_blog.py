@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog import autocomplete, schedule
+from blog.cache import bump_feed_generation
+from blog.models import Category, Comment, Location, Post
+from blog.seeding import (
+    N_CATEGORIES,
+    N_LOCATIONS,
+    POSTS_PER_USER,
+    category_fields,
+    comment_fields,
+    location_fields,
+    post_fields,
+)
+
+
+@contextmanager
+def explicit_created_at(model):
+    """Отключает auto_now_add, чтобы bulk_create вставил заданные даты."""
+    field = model._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, категориями, '
+        'местами, постами и комментариями через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--comments-per-post', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        n_posts = options['posts']
+        self.now = timezone.now()
+        # Суффикс не даёт повторному запуску упереться в уникальные поля.
+        last_pk = get_user_model().objects.aggregate(last=Max('pk'))['last']
+        suffix = (last_pk or 0) + 1
+
+        users = self.create_users(max(n_posts // POSTS_PER_USER, 1), suffix)
+        categories = Category.objects.bulk_create(
+            Category(**category_fields(rnd, i, f'seed-{suffix}-{i}'))
+            for i in range(N_CATEGORIES)
+        )
+        locations = Location.objects.bulk_create(
+            Location(**location_fields(i)) for i in range(N_LOCATIONS)
+        )
+
+        post_ids = []
+        for start in range(0, n_posts, batch_size):
+            stop = min(start + batch_size, n_posts)
+            with transaction.atomic():
+                post_ids += [post.pk for post in Post.objects.bulk_create(
+                    Post(**post_fields(
+                        rnd, i, self.now, users, categories, locations
+                    ))
+                    for i in range(start, stop)
+                )]
+            self.stdout.write(f'Постов: {stop}/{n_posts}')
+
+        n_comments = n_posts * options['comments_per_post']
+        rnd.shuffle(post_ids)
+        for start in range(0, n_comments, batch_size):
+            stop = min(start + batch_size, n_comments)
+            with transaction.atomic(), explicit_created_at(Comment):
+                Comment.objects.bulk_create(
+                    Comment(**comment_fields(
+                        rnd, i, self.now, post_ids, users
+                    ))
+                    for i in range(start, stop)
+                )
+            self.stdout.write(f'Комментариев: {stop}/{n_comments}')
+
+        # bulk_create минует сигналы, поэтому счётчики сводятся одним
+        # запросом после вставки, а расписание, кэш ленты и индекс
+        # подсказок обновляются явно.
+        call_command('recount_comments', stdout=self.stdout)
+        self.refresh_schedule(users, categories)
+        bump_feed_generation()
+        autocomplete.record_rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, постов: {n_posts},'
+            f' комментариев: {n_comments}'
+        ))
+
+    def create_users(self, n_users, suffix):
+        User = get_user_model()
+        with transaction.atomic():
+            return User.objects.bulk_create(
+                (
+                    User(username=f'seed_{suffix}_{i}', password='!')
+                    for i in range(n_users)
+                ),
+                batch_size=10_000,
+            )
+
+    def refresh_schedule(self, users, categories):
+        schedule.refresh(schedule.SITE)
+        for category in categories:
+            schedule.refresh(schedule.CATEGORY, category.slug)
+        for user in users:
+            schedule.refresh(schedule.AUTHOR, user.username)
@@ -0,0 +1,99 @@
+"""Middleware для разработки и диагностики.
+
+QueryBudgetMiddleware считает запросы и время в базе за запрос и сверяет
+их с таблицей settings.QUERY_BUDGETS по имени URL; подключается только
+при DEBUG. ProfilingMiddleware профилирует отдельный запрос по флагу.
+"""
+import cProfile
+import logging
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .constants import PROFILE_HEADER, PROFILE_QUERY_PARAM
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def query_budget(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        logger.debug(
+            '%s: %d запросов, %.1f мс в базе',
+            view_name, stats.count, stats.duration * 1000,
+        )
+        budget = query_budget(view_name) if match else None
+        if budget is not None and stats.count > budget:
+            message = (
+                f'{view_name}: {stats.count} SQL-запросов'
+                f' ({stats.duration * 1000:.1f} мс) при бюджете {budget}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class ProfilingMiddleware:
+    """cProfile одного запроса по флагу ?profile или заголовку X-Profile.
+
+    Доступно только staff; без флага запрос проходит без изменений.
+    Результат пишется в settings.PROFILE_DIR/<имя URL>/<время>.prof.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (
+            PROFILE_QUERY_PARAM in request.GET
+            or PROFILE_HEADER in request.META
+        ) or not request.user.is_staff:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        directory = Path(settings.PROFILE_DIR) / view_name.replace(':', '.')
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = directory / f'{stamp}-{time.monotonic_ns()}.prof'
+        profiler.dump_stats(path)
+        logger.info('Профиль %s сохранён в %s', view_name, path)
+        response['X-Profile-File'] = path.name
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:13
+
+import blog.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='blog.post')),
+                ('title', models.TextField()),
+                ('text', models.TextField()),
+                ('document', blog.models.FullTextField(db_column='blog_post_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'blog_post_fts',
+                'managed': False,
+            },
+        ),
+        # Триггеры синхронизации ставит blog.search.install_triggers
+        # по сигналу post_migrate.
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+                "title, text, content='blog_post', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')",
+                "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+                'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+                'DROP TRIGGER IF EXISTS blog_post_fts_update',
+                'DROP TABLE blog_post_fts',
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Уменьшенные копии создаются при загрузке.', verbose_name='Ширины копий изображения'),
+        ),
+    ]
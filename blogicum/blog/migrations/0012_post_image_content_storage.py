@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:25
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, help_text='Загрузите изображение для публикации', null=True, storage=blog.storage.post_image_storage, upload_to='posts/', verbose_name='Изображение'),
+        ),
+    ]
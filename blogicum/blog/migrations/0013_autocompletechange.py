@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_image_content_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutocompleteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(null=True, verbose_name='ID объекта')),
+                ('label', models.CharField(blank=True, max_length=256, verbose_name='Название')),
+                ('url_arg', models.CharField(blank=True, max_length=256, verbose_name='Аргумент адреса')),
+                ('pub_date', models.DateTimeField(null=True, verbose_name='Дата публикации')),
+                ('removed', models.BooleanField(default=False, verbose_name='Убрать из подсказок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Добавлено')),
+            ],
+            options={
+                'verbose_name': 'изменение подсказок',
+                'verbose_name_plural': 'Изменения подсказок',
+            },
+        ),
+    ]
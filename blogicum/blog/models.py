@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
+from django.utils import timezone
+from django.utils.text import Truncator
 
-from . import constants
+from . import constants, images
+from .search import FTS_TABLE, match_expression
+from .storage import post_image_storage
 
 User = get_user_model()
 
@@ -69,6 +73,55 @@ class Location(TimeStampedPublishedModel):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+    # Только то, что выводит includes/post_card.html и нужно для ключей кэша.
+    FEED_FIELDS = (
+        'title',
+        'excerpt',
+        'image',
+        'image_renditions',
+        'pub_date',
+        'is_published',
+        'comment_count',
+        'category',
+        'category__title',
+        'category__slug',
+        'category__is_published',
+        'location',
+        'location__name',
+        'location__is_published',
+        'author',
+        'author__username',
+    )
+
+    def published(self):
+        return self.filter(is_visible=True, pub_date__lte=timezone.now())
+
+    def scheduled(self):
+        return self.filter(is_visible=True, pub_date__gt=timezone.now())
+
+    def visible_to(self, user):
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(
+            models.Q(author=user)
+            | models.Q(is_visible=True, pub_date__lte=timezone.now())
+        )
+
+    def for_feed(self):
+        return self.select_related(
+            'category', 'location', 'author'
+        ).only(*self.FEED_FIELDS)
+
+    def search(self, query):
+        expression = match_expression(query)
+        if not expression:
+            return self.none()
+        return self.filter(
+            search_entry__document__match=expression
+        ).order_by('search_entry__rank', '-pub_date', '-id')
+
+
 class Post(TimeStampedPublishedModel):
     title = models.CharField(
         max_length=constants.TITLE_MAX_LENGTH,
@@ -78,6 +131,12 @@ class Post(TimeStampedPublishedModel):
         verbose_name='Текст',
         validators=[MinLengthValidator(constants.MIN_LENGTH_DESCRIPTION)]
     )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс',
+        help_text='Начало текста для ленты, обновляется при сохранении.'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=(
@@ -108,20 +167,186 @@ class Post(TimeStampedPublishedModel):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True,
         null=True,
+        db_index=True,
         verbose_name='Изображение',
         help_text='Загрузите изображение для публикации'
     )
+    is_visible = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Виден в ленте',
+        help_text='Опубликован сам пост и его категория.'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    image_renditions = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='Ширины копий изображения',
+        help_text='Уменьшенные копии создаются при загрузке.'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                condition=models.Q(is_visible=True),
+                name='post_published_feed_idx'
+            ),
+            models.Index(
+                fields=['category', '-pub_date', '-id'],
+                condition=models.Q(is_visible=True),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'image' in field_names:
+            # Имя из базы: после замены изображения старый файл
+            # освобождается.
+            instance._stored_image = values[field_names.index('image')]
+        return instance
+
+    @staticmethod
+    def make_excerpt(text):
+        return Truncator(text).words(constants.EXCERPT_WORDS, truncate=' …')
+
+    @property
+    def image_src(self):
+        if not self.image_renditions:
+            return self.image.url
+        return self.image.storage.url(images.rendition_name(
+            self.image.name, self.image_renditions[0]
+        ))
+
+    @property
+    def image_srcset(self):
+        return images.srcset(self.image, self.image_renditions)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = self.make_excerpt(self.text)
+            if update_fields is not None:
+                update_fields.add('excerpt')
+        new_image = False
+        stored_image = getattr(self, '_stored_image', None)
+        stored_renditions = self.image_renditions
+        if update_fields is None or 'image' in update_fields:
+            # Копии нового файла создаст очередь ImageJob, а до тех пор
+            # карточка показывает оригинал.
+            new_image = bool(self.image) and not self.image._committed
+            if new_image or not self.image:
+                self.image_renditions = []
+            if update_fields is not None:
+                update_fields.add('image_renditions')
+        self.is_visible = (
+            self.is_published
+            and self.category is not None
+            and self.category.is_published
+        )
+        if update_fields is not None:
+            if {'is_published', 'category', 'category_id'} & update_fields:
+                update_fields.add('is_visible')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._image_saved(stored_image, stored_renditions, new_image)
+
+    def _image_saved(self, stored_image, stored_renditions, new_image):
+        self._stored_image = self.image.name
+        if stored_image and stored_image != self.image.name:
+            transaction.on_commit(lambda: self.release_image(
+                stored_image, stored_renditions
+            ))
+        if not new_image:
+            return
+        # Тот же файл уже загружали: его копии готовы.
+        twin = Post.objects.filter(image=self.image.name).exclude(
+            pk=self.pk
+        ).exclude(image_renditions=[]).values_list(
+            'image_renditions', flat=True
+        ).first()
+        if twin is None:
+            ImageJob.objects.create(post=self, image_name=self.image.name)
+        else:
+            self.image_renditions = twin
+            Post.objects.filter(pk=self.pk).update(image_renditions=twin)
+
+    @staticmethod
+    def release_image(name, renditions=()):
+        """Удаляет файл, если на него больше не ссылается ни один пост.
+
+        Возвращает False, если файл оставлен: на него ссылаются или его
+        только что загрузили снова.
+        """
+        storage = post_image_storage()
+        with storage.lock():
+            if (
+                Post.objects.filter(image=name).exists()
+                or storage.recently_used(name)
+            ):
+                return False
+            ImageJob.objects.filter(image_name=name).delete()
+            images.delete_image(name, renditions)
+        return True
+
+
+class FullTextField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы: цель оператора MATCH."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class PostSearch(models.Model):
+    """Строка индекса blog_post_fts; rowid совпадает с id поста."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+    title = models.TextField()
+    text = models.TextField()
+    document = FullTextField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -149,6 +374,111 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['post', 'created_at', 'id'],
+                name='comment_thread_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Комментарий от {self.author} к "{self.post.title}"'
+
+
+class ImageJob(models.Model):
+    """Задача на копии Post.image; её выполняет команда process_images."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Обрабатывается'
+        FAILED = 'failed', 'Ошибка'
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    image_name = models.CharField(
+        max_length=255,
+        verbose_name='Файл изображения'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='image_job_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.image_name
+
+
+class AutocompleteChange(models.Model):
+    """Запись в журнале изменений индекса подсказок.
+
+    Каждый процесс применяет к своему индексу записи после последней
+    увиденной; kind='rebuild' просит перестроить индекс целиком.
+    """
+
+    kind = models.CharField(max_length=16, verbose_name='Тип')
+    object_id = models.PositiveIntegerField(
+        null=True,
+        verbose_name='ID объекта'
+    )
+    label = models.CharField(
+        max_length=256,
+        blank=True,
+        verbose_name='Название'
+    )
+    url_arg = models.CharField(
+        max_length=256,
+        blank=True,
+        verbose_name='Аргумент адреса'
+    )
+    pub_date = models.DateTimeField(
+        null=True,
+        verbose_name='Дата публикации'
+    )
+    removed = models.BooleanField(
+        default=False,
+        verbose_name='Убрать из подсказок'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'изменение подсказок'
+        verbose_name_plural = 'Изменения подсказок'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,68 @@
+"""Ближайшие отложенные публикации по сайту, категориям и авторам.
+
+Значения лежат в кэше и пересчитываются при записи постов и категорий,
+поэтому чтение не обращается к базе. Запись живёт до своей даты, но
+не дольше FEED_PAGE_CACHE_TIMEOUT: после выхода публикации или
+пропущенного пересчёта (например, записи в обход сигналов) она истекает
+и пересчитывается при чтении.
+"""
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from .constants import FEED_PAGE_CACHE_TIMEOUT
+from .models import Post
+
+SITE = 'site'
+CATEGORY = 'category'
+AUTHOR = 'author'
+
+SCHEDULE_KEY = 'blog:next_pub:{}:{}'
+SCOPE_FILTERS = {
+    SITE: None,
+    CATEGORY: 'category__slug',
+    AUTHOR: 'author__username',
+}
+
+
+def _cache_key(scope, key):
+    return SCHEDULE_KEY.format(
+        scope, hashlib.md5(str(key).encode()).hexdigest()
+    )
+
+
+def _compute(scope, key):
+    lookup = SCOPE_FILTERS[scope]
+    filters = {lookup: key} if lookup else {}
+    return Post.objects.scheduled().filter(**filters).aggregate(
+        next_pub_date=Min('pub_date')
+    )['next_pub_date']
+
+
+def refresh(scope, key=''):
+    next_pub_date = _compute(scope, key)
+    timeout = FEED_PAGE_CACHE_TIMEOUT
+    if next_pub_date is not None:
+        seconds = (next_pub_date - timezone.now()).total_seconds()
+        timeout = min(max(math.ceil(seconds), 1), timeout)
+    cache.set(_cache_key(scope, key), (next_pub_date,), timeout)
+    return next_pub_date
+
+
+def next_publication(scope=SITE, key=''):
+    cached = cache.get(_cache_key(scope, key))
+    if cached is None:
+        return refresh(scope, key)
+    return cached[0]
+
+
+def scope_for_request(request):
+    kwargs = request.resolver_match.kwargs if request.resolver_match else {}
+    if 'category_slug' in kwargs:
+        return CATEGORY, kwargs['category_slug']
+    if 'username' in kwargs:
+        return AUTHOR, kwargs['username']
+    return SITE, ''
@@ -0,0 +1,67 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+blog_post_fts — внешний индекс (content='blog_post') по заголовку и
+тексту, его создаёт миграция 0009. Синхронизация — триггерами на
+blog_post, поэтому индекс видит и bulk_create, и сырые UPDATE. Триггеры
+ставятся после каждого migrate: SQLite-бэкенд Django пересоздаёт таблицу
+при изменении полей и теряет их вместе со старой таблицей.
+"""
+import re
+
+from django.db import connections
+
+from .constants import SEARCH_MAX_TERMS
+
+FTS_TABLE = 'blog_post_fts'
+
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+    AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+    AFTER DELETE ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+
+def install_triggers(using='default'):
+    connection = connections[using]
+    if FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in TRIGGERS:
+            cursor.execute(sql)
+
+
+def rebuild(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def match_expression(query):
+    """Запрос пользователя как выражение MATCH: все слова по префиксу.
+
+    Кавычки и операторы FTS5 из ввода не пропускаются — остаются только
+    слова, поэтому выражение всегда синтаксически корректно.
+    """
+    terms = re.findall(r'\w+', query)[:SEARCH_MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
@@ -0,0 +1,78 @@
+"""Синтетические данные с перекосом, как в живом блоге.
+
+Общий генератор для команды seed_blog и бенчмарков (benchmarks/data.py):
+строки отдаются словарями значений полей, а вставляет их каждый по-своему —
+bulk_create или сырым executemany. Авторы и комментарии распределены со
+степенным перекосом: немногие пользователи пишут большую часть постов,
+немногие посты собирают большую часть комментариев.
+"""
+from datetime import timedelta
+
+from .models import Post
+
+POSTS_PER_USER = 100
+N_CATEGORIES = 50
+N_LOCATIONS = 20
+HIDDEN_CATEGORY_SHARE = 0.1
+SCHEDULED_SHARE = 0.01
+UNPUBLISHED_SHARE = 0.05
+SKEW = 3
+MAX_AGE_MINUTES = 2_500_000
+MAX_DELAY_MINUTES = 10_000
+TEXT = 'Сгенерированный текст публикации для нагрузочного тестирования. '
+TEXTS = [(TEXT * n, Post.make_excerpt(TEXT * n)) for n in range(1, 11)]
+
+
+def skewed(rnd, items):
+    """Степенной перекос: на первые 10% элементов приходится почти половина
+    выборок.
+    """
+    return items[int(len(items) * rnd.random() ** SKEW)]
+
+
+def _past(rnd, now):
+    return now - timedelta(minutes=rnd.randint(0, MAX_AGE_MINUTES))
+
+
+def category_fields(rnd, i, slug):
+    return {
+        'title': f'Категория {i}',
+        'description': 'Сгенерированная категория',
+        'slug': slug,
+        'is_published': rnd.random() > HIDDEN_CATEGORY_SHARE,
+    }
+
+
+def location_fields(i):
+    return {'name': f'Место {i}'}
+
+
+def post_fields(rnd, i, now, users, categories, locations):
+    """Пост; доля отложенных и снятых с публикации — как в живом блоге."""
+    if rnd.random() < SCHEDULED_SHARE:
+        pub_date = now + timedelta(minutes=rnd.randint(1, MAX_DELAY_MINUTES))
+    else:
+        pub_date = _past(rnd, now)
+    category = rnd.choice(categories)
+    is_published = rnd.random() > UNPUBLISHED_SHARE
+    text, excerpt = rnd.choice(TEXTS)
+    return {
+        'title': f'Публикация {i}',
+        'text': text,
+        'excerpt': excerpt,
+        'pub_date': pub_date,
+        'author_id': skewed(rnd, users).pk,
+        'category_id': category.pk,
+        'location_id': rnd.choice(locations).pk,
+        'is_published': is_published,
+        'is_visible': is_published and category.is_published,
+    }
+
+
+def comment_fields(rnd, i, now, post_ids, users):
+    return {
+        'post_id': skewed(rnd, post_ids),
+        'author_id': rnd.choice(users).pk,
+        'text': f'Комментарий {i}',
+        'created_at': _past(rnd, now),
+    }
@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import autocomplete, schedule, search
+from .cache import bump_feed_generation, bump_version
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+        bump_version('post', instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+    bump_version('post', instance.post_id)
+
+
+def set_visibility(posts, is_visible):
+    """Массово меняет видимость постов и пишет её в журнал подсказок."""
+    rows = list(posts.values_list('pk', 'title', 'pub_date'))
+    posts.update(is_visible=is_visible)
+    autocomplete.record_many(autocomplete.POST, {
+        pk: (
+            autocomplete.Entry(autocomplete.POST, title, pk, pub_date)
+            if is_visible else None
+        )
+        for pk, title, pub_date in rows
+    })
+
+
+@receiver(post_save, sender=Category)
+def sync_category_visibility(sender, instance, **kwargs):
+    posts = Post.objects.filter(category=instance)
+    if instance.is_published:
+        set_visibility(posts.filter(is_published=True, is_visible=False), True)
+    else:
+        set_visibility(posts.filter(is_visible=True), False)
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    set_visibility(
+        Post.objects.filter(category=instance, is_visible=True), False
+    )
+
+
+def is_login(update_fields):
+    """Вход сохраняет пользователя ради одного last_login."""
+    return update_fields is not None and set(update_fields) == {'last_login'}
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=User)
+def bump_card_version(sender, instance, update_fields=None, **kwargs):
+    if sender is User and is_login(update_fields):
+        return
+    bump_version(sender._meta.model_name, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=User)
+def bump_feed_cache(sender, update_fields=None, **kwargs):
+    # Имя и дата регистрации видны на странице профиля.
+    if sender is User and is_login(update_fields):
+        return
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_schedule(sender, instance, **kwargs):
+    # Удаление поста может лишь отодвинуть ближайшую публикацию, а ранняя
+    # устаревшая дата безопасна: кэш просто истечёт раньше.
+    schedule.refresh(schedule.SITE)
+    if instance.category is not None:
+        schedule.refresh(schedule.CATEGORY, instance.category.slug)
+    schedule.refresh(schedule.AUTHOR, instance.author.username)
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_schedule(sender, instance, **kwargs):
+    schedule.refresh(schedule.SITE)
+    schedule.refresh(schedule.CATEGORY, instance.slug)
+    authors = Post.objects.filter(
+        category=instance, pub_date__gt=timezone.now()
+    ).values_list('author__username', flat=True).distinct()
+    for username in authors:
+        schedule.refresh(schedule.AUTHOR, username)
+
+
+@receiver(post_save, sender=Post)
+def index_post_title(sender, instance, **kwargs):
+    autocomplete.record(
+        autocomplete.POST, instance.pk, autocomplete.post_entry(instance)
+    )
+
+
+@receiver(post_save, sender=User)
+def index_username(sender, instance, update_fields=None, **kwargs):
+    if is_login(update_fields):
+        return
+    autocomplete.record(
+        autocomplete.USER, instance.pk, autocomplete.user_entry(instance)
+    )
+
+
+@receiver(post_save, sender=Category)
+def index_category_title(sender, instance, **kwargs):
+    autocomplete.record(
+        autocomplete.CATEGORY, instance.pk,
+        autocomplete.category_entry(instance),
+    )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=User)
+def unindex_deleted(sender, instance, **kwargs):
+    kind = {
+        Post: autocomplete.POST,
+        Category: autocomplete.CATEGORY,
+        User: autocomplete.USER,
+    }[sender]
+    autocomplete.record(kind, instance.pk, None)
+
+
+@receiver(post_migrate, dispatch_uid='blog_install_search_triggers')
+def install_search_triggers(sender, using, **kwargs):
+    if sender.name == 'blog':
+        search.install_triggers(using)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    if instance.image:
+        transaction.on_commit(lambda: Post.release_image(
+            instance.image.name, instance.image_renditions
+        ))
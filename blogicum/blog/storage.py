@@ -0,0 +1,129 @@
+"""Хранилище Post.image с адресацией по содержимому.
+
+Файл сохраняется под SHA-256 своего содержимого: posts/ab/abcd….jpg.
+Повторная загрузка той же картинки не создаёт копию, а получает имя уже
+лежащего файла, поэтому адрес файла никогда не меняет содержимое и его
+можно кэшировать бессрочно. Счётчик ссылок — число постов с этим именем
+в базе (Post.release_image); когда ссылок не остаётся, файл и его копии
+удаляются.
+
+Повторная загрузка обновляет время изменения файла, а пост со ссылкой
+на него сохраняется позже. Поэтому файл, тронутый за последние
+IMAGE_ORPHAN_GRACE секунд, не удаляется даже без ссылок: его уберёт
+команда cleanup_images. Запись файла (или касание уже лежащего) и
+проверка «ссылок нет, давно не трогали — удалить» идут под общей
+блокировкой между процессами: flock на POSIX, msvcrt.locking на Windows.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, storages
+
+from .constants import IMAGE_HASH_CHUNK_SIZE, IMAGE_ORPHAN_GRACE
+
+
+def content_name(name, content):
+    """Имя файла по хешу содержимого, читаемого кусками."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(IMAGE_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    directory, filename = os.path.split(name)
+    digest = digest.hexdigest()
+    extension = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, digest[:2], digest + extension)
+
+
+if fcntl is not None:
+    def _lock_file(file):
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+    def _unlock_file(file):
+        fcntl.flock(file, fcntl.LOCK_UN)
+else:
+    # Windows: блокировка первого байта файла.
+    def _lock_file(file):
+        file.seek(0)
+        while True:
+            try:
+                # LK_LOCK ждёт около 10 секунд, затем OSError.
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass
+
+    def _unlock_file(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def original_name(name):
+    """Имя для повторного сохранения: без каталога по первым знакам хеша."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    if (
+        re.fullmatch(r'[0-9a-f]{64}', stem)
+        and os.path.basename(directory) == stem[:2]
+    ):
+        directory = os.path.dirname(directory)
+    return os.path.join(directory, filename)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        # Файл с тем же именем — тот же файл, суффиксы не нужны.
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    @contextmanager
+    def lock(self):
+        """Блокировка между процессами на время записи или удаления."""
+        # Файл блокировки лежит вне MEDIA_ROOT, чтобы не отдаваться по URL.
+        digest = hashlib.md5(str(self.location).encode()).hexdigest()
+        path = os.path.join(tempfile.gettempdir(), f'blogicum-{digest}.lock')
+        with open(path, 'a') as file:
+            _lock_file(file)
+            try:
+                yield
+            finally:
+                _unlock_file(file)
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content)
+        # Одинаковые загрузки из разных процессов пишут файл по очереди:
+        # вторая застаёт его целиком и только трогает.
+        with self.lock():
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                return super().save(name, content, max_length)
+
+    def save_as(self, name, content):
+        """Сохраняет производный файл (копию) под заданным именем."""
+        return super().save(name, content)
+
+    def recently_used(self, name):
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return time.time() - modified < IMAGE_ORPHAN_GRACE
+
+
+def post_image_storage():
+    return storages['post_images']
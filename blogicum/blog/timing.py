@@ -0,0 +1,148 @@
+"""Фазы обработки запроса: заголовок Server-Timing и перцентили.
+
+Включается настройкой SERVER_TIMING. Для представлений blog и pages
+меряются весь запрос, middleware вместе с разрешением URL, представление,
+SQL и рендер шаблона. Последние TIMING_SAMPLES замеров каждой фазы
+хранятся в памяти процесса; сводку отдаёт report().
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+from .constants import TIMING_PERCENTILES, TIMING_SAMPLES
+
+TIMED_NAMESPACES = ('blog', 'pages')
+
+_current = ContextVar('server_timing', default=None)
+_samples = defaultdict(lambda: deque(maxlen=TIMING_SAMPLES))
+_lock = threading.Lock()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations['db'] += time.perf_counter() - started
+
+    def header(self):
+        metrics = []
+        for name, seconds in self.durations.items():
+            metric = f'{name};dur={seconds * 1000:.1f}'
+            if name == 'db':
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+
+@contextmanager
+def phase(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - started
+
+
+def _percentile(ordered, percent):
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def record(view_name, timings):
+    with _lock:
+        for name, seconds in timings.durations.items():
+            _samples[view_name, name].append(seconds)
+
+
+def report():
+    """{view_name: {phase: {'count': n, 'p50': мс, ...}}}."""
+    with _lock:
+        samples = {key: sorted(values) for key, values in _samples.items()}
+    result = defaultdict(dict)
+    for (view_name, name), ordered in sorted(samples.items()):
+        stats = {'count': len(ordered)}
+        for percent in TIMING_PERCENTILES:
+            stats[f'p{percent}'] = round(
+                _percentile(ordered, percent) * 1000, 2
+            )
+        result[view_name][name] = stats
+    return dict(result)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with phase('render'):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов, засекающий рендер в текущем запросе."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class ServerTimingMiddleware:
+    """Ставится первым в MIDDLEWARE, чтобы total включал всё остальное."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        finished = time.perf_counter()
+        total = finished - started
+        view_started = getattr(request, '_view_started', None)
+        if view_started is not None:
+            view = finished - view_started
+            timings.durations['view'] = view
+            timings.durations['middleware'] = total - view
+        timings.durations['total'] = total
+
+        match = request.resolver_match
+        if match and match.namespace in TIMED_NAMESPACES:
+            response['Server-Timing'] = timings.header()
+            record(match.view_name, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
@@ -36,4 +36,9 @@ urlpatterns = [
     path('posts/<int:post_id>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
+    path('search/', views.search, name='search'),
+    path('autocomplete/',
+         views.autocomplete_suggestions,
+         name='autocomplete'),
+    path('server-timing/', views.server_timing, name='server_timing'),
 ]
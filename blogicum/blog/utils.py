@@ -1,7 +1,270 @@
+import collections.abc
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 from django.core.paginator import Paginator, Page
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .cache import cached_count
+from .constants import (
+    COMMENTS_PER_PAGE,
+    OFFSET_PAGINATION_MAX_PAGE,
+    PAGE_LINKS_ON_EACH_SIDE,
+)
+
+FEED_ORDERING = ('-pub_date', '-id')
+CURSOR_LAST = 'last'
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(direction, obj, key_field='pub_date'):
+    micros = (getattr(obj, key_field) - _EPOCH) // timedelta(microseconds=1)
+    return f'{direction}.{micros}.{obj.id}'
+
+
+def decode_cursor(cursor):
+    try:
+        direction, micros, post_id = cursor.split('.')
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        pub_date = _EPOCH + timedelta(microseconds=int(micros))
+        return direction, pub_date, int(post_id)
+    except (ValueError, OverflowError):
+        raise Http404('Некорректный адрес страницы')
+
+
+def elided_page_range(
+    number, num_pages, ellipsis, on_each_side=PAGE_LINKS_ON_EACH_SIDE
+):
+    """Первая страница, окно вокруг текущей и многоточия на месте пропусков.
+
+    Номера считаются арифметически, поэтому стоимость не зависит от числа
+    страниц. Ссылки даются не дальше OFFSET_PAGINATION_MAX_PAGE, дальше
+    лента листается курсором.
+    """
+    last = min(num_pages, OFFSET_PAGINATION_MAX_PAGE)
+    start = max(number - on_each_side, 1)
+    end = min(number + on_each_side, last)
+    if start > 1:
+        yield 1
+        if start > 2:
+            yield ellipsis if start > 3 else 2
+    yield from range(start, end + 1)
+    if end < last - 1:
+        yield ellipsis if end < last - 2 else last - 1
+    if end < last:
+        yield last
+    if num_pages > last:
+        yield ellipsis
+
+
+class FeedPage(Page):
+    """Страница с номером; после OFFSET_PAGINATION_MAX_PAGE — курсор."""
+
+    @property
+    def previous_query(self):
+        return f'page={self.previous_page_number()}'
+
+    @property
+    def next_query(self):
+        if self.number < OFFSET_PAGINATION_MAX_PAGE:
+            return f'page={self.next_page_number()}'
+        return f'cursor={encode_cursor("n", self[-1])}'
+
+    @property
+    def last_query(self):
+        if self.paginator.num_pages <= OFFSET_PAGINATION_MAX_PAGE:
+            return f'page={self.paginator.num_pages}'
+        return f'cursor={CURSOR_LAST}'
+
+    @property
+    def page_links(self):
+        return elided_page_range(
+            self.number, self.paginator.num_pages, self.paginator.ELLIPSIS
+        )
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты с ограниченным и закэшированным COUNT.
+
+    Страницы дальше OFFSET_PAGINATION_MAX_PAGE открываются курсором,
+    поэтому точное число постов сверх этого порога не нужно: COUNT
+    считается по подзапросу с LIMIT и означает «не меньше».
+    """
+
+    def __init__(self, *args, request=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request = request
+
+    @cached_property
+    def count(self):
+        if self.request is None:
+            return self._bounded_count()
+        return cached_count(self.request, self._bounded_count)
+
+    def _bounded_count(self):
+        limit = OFFSET_PAGINATION_MAX_PAGE * self.per_page + 1
+        return self.object_list[:limit].count()
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class SearchPage(Page):
+    @property
+    def previous_query(self):
+        return f'page={self.previous_page_number()}'
+
+    @property
+    def next_query(self):
+        return f'page={self.next_page_number()}'
+
+    @property
+    def last_query(self):
+        return f'page={self.paginator.num_pages}'
+
+    @property
+    def page_links(self):
+        return elided_page_range(
+            self.number, self.paginator.num_pages, self.paginator.ELLIPSIS
+        )
+
+
+class SearchPaginator(Paginator):
+    """Результаты поиска по релевантности, не дальше
+    OFFSET_PAGINATION_MAX_PAGE страниц: COUNT и OFFSET ограничены.
+    """
+
+    @cached_property
+    def count(self):
+        limit = OFFSET_PAGINATION_MAX_PAGE * self.per_page
+        return self.object_list[:limit].count()
+
+    def _get_page(self, *args, **kwargs):
+        return SearchPage(*args, **kwargs)
+
+
+class KeysetPage(collections.abc.Sequence):
+    """Страница, выбранная по ключу (pub_date, id) без OFFSET и COUNT(*)."""
+
+    number = None
+    page_links = ()
+
+    def __init__(
+        self, object_list, has_next, has_previous,
+        key_field='pub_date', query_param='cursor'
+    ):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.key_field = key_field
+        self.query_param = query_param
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def previous_query(self):
+        cursor = encode_cursor('p', self[0], self.key_field)
+        return f'{self.query_param}={cursor}'
+
+    @property
+    def next_query(self):
+        cursor = encode_cursor('n', self[-1], self.key_field)
+        return f'{self.query_param}={cursor}'
+
+    @property
+    def last_query(self):
+        return f'cursor={CURSOR_LAST}'
+
+
+def _get_keyset_page(post_list, cursor, per_page):
+    if cursor == CURSOR_LAST:
+        posts = list(post_list.order_by('pub_date', 'id')[:per_page + 1])
+        return KeysetPage(
+            posts[:per_page][::-1],
+            has_next=False,
+            has_previous=len(posts) > per_page
+        )
+
+    direction, pub_date, post_id = decode_cursor(cursor)
+    if direction == 'n':
+        posts = list(post_list.filter(
+            Q(pub_date__lte=pub_date),
+            Q(pub_date__lt=pub_date) | Q(id__lt=post_id)
+        ).order_by(*FEED_ORDERING)[:per_page + 1])
+        if not posts:
+            return _get_keyset_page(post_list, CURSOR_LAST, per_page)
+        return KeysetPage(
+            posts[:per_page],
+            has_next=len(posts) > per_page,
+            has_previous=True
+        )
+
+    posts = list(post_list.filter(
+        Q(pub_date__gte=pub_date),
+        Q(pub_date__gt=pub_date) | Q(id__gt=post_id)
+    ).order_by('pub_date', 'id')[:per_page + 1])
+    if len(posts) <= per_page:
+        # Дошли до начала ленты — отдаём каноническую первую страницу.
+        return None
+    return KeysetPage(posts[:per_page][::-1], has_next=True, has_previous=True)
 
 
 def paginate_page(request, post_list, posts_per_page=10) -> Page:
-    paginator = Paginator(post_list, posts_per_page)
-    page_number = request.GET.get('page')
+    post_list = post_list.order_by(*FEED_ORDERING)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        page = _get_keyset_page(post_list, cursor, posts_per_page)
+        if page is not None:
+            return page
+        page_number = 1
+    else:
+        page_number = request.GET.get('page')
+        # Номер за пределами 1..MAX не откатывается на последнюю страницу:
+        # при ограниченном COUNT она не настоящая.
+        if (
+            page_number and page_number.lstrip('-').isdigit()
+            and not 1 <= int(page_number) <= OFFSET_PAGINATION_MAX_PAGE
+        ):
+            raise Http404('Страница не найдена')
+
+    paginator = FeedPaginator(post_list, posts_per_page, request=request)
     return paginator.get_page(page_number)
+
+
+def paginate_comments(request, comments, per_page=COMMENTS_PER_PAGE):
+    """Комментарии «от старых к новым» порциями по (created_at, id)."""
+    comments = comments.order_by('created_at', 'id')
+    cursor = request.GET.get('comments')
+    if cursor:
+        _, created_at, comment_id = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created_at__gte=created_at),
+            Q(created_at__gt=created_at) | Q(id__gt=comment_id)
+        )
+    items = list(comments[:per_page + 1])
+    return KeysetPage(
+        items[:per_page],
+        has_next=len(items) > per_page,
+        has_previous=bool(cursor),
+        key_field='created_at',
+        query_param='comments'
+    )
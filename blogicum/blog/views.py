@@ -1,17 +1,20 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q, Count
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
 from django.views.generic import CreateView, DeleteView, UpdateView
 
+from . import autocomplete, timing
+from .cache import cache_anonymous_page, page_etag, with_card_versions
 from .forms import CustomUserChangeForm, SimpleCommentForm
 from .models import Category, Comment, Post
-from .utils import paginate_page
+from .utils import SearchPaginator, paginate_comments, paginate_page
 
 
 @login_required
@@ -33,18 +36,14 @@ def home(request):
     return index(request)
 
 
+@condition(etag_func=page_etag)
+@cache_anonymous_page
 def index(request):
-    posts = Post.objects.select_related(
-        'category', 'location', 'author'
-    ).filter(
-        Q(is_published=True),
-        Q(category__is_published=True),
-        Q(pub_date__lte=timezone.now())
-    ).order_by('-pub_date')
+    posts = Post.objects.published().for_feed()
 
-    posts = posts.annotate(comment_count=Count('comments'))
-
-    page_obj = paginate_page(request, posts, posts_per_page=10)
+    page_obj = with_card_versions(
+        paginate_page(request, posts, posts_per_page=10)
+    )
 
     context = {
         'page_obj': page_obj,
@@ -53,29 +52,23 @@ def index(request):
     return render(request, 'blog/index.html', context)
 
 
+@condition(etag_func=page_etag)
 def post_detail(request, id):
     post = get_object_or_404(
-        Post.objects.select_related('category', 'location', 'author'),
+        Post.objects.visible_to(request.user).select_related(
+            'category', 'location', 'author'
+        ),
         id=id
     )
 
     is_author = request.user == post.author
 
-    if not is_author:
-        if not post.is_published:
-            raise Http404('Пост не найден')
-        if not post.category.is_published:
-            raise Http404('Категория не найдена')
-        if post.pub_date > timezone.now():
-            raise Http404('Пост еще не опубликован')
-
-    comments = post.comments.select_related('author').all()
-
-    post_with_counts = Post.objects.filter(
-        id=post.id).annotate(comment_count=Count('comments')).first()
+    comments = paginate_comments(
+        request, post.comments.select_related('author')
+    )
 
     context = {
-        'post': post_with_counts or post,
+        'post': post,
         'form': SimpleCommentForm(),
         'comments': comments,
         'is_post_author': is_author,
@@ -83,6 +76,8 @@ def post_detail(request, id):
     return render(request, 'blog/detail.html', context)
 
 
+@condition(etag_func=page_etag)
+@cache_anonymous_page
 def category_posts(request, category_slug):
     category = get_object_or_404(
         Category,
@@ -90,17 +85,11 @@ def category_posts(request, category_slug):
         is_published=True
     )
 
-    posts = Post.objects.select_related(
-        'category', 'location', 'author'
-    ).filter(
-        Q(category=category),
-        Q(is_published=True),
-        Q(pub_date__lte=timezone.now())
-    ).order_by('-pub_date')
-
-    posts = posts.annotate(comment_count=Count('comments'))
+    posts = category.posts.published().for_feed()
 
-    page_obj = paginate_page(request, posts, posts_per_page=10)
+    page_obj = with_card_versions(
+        paginate_page(request, posts, posts_per_page=10)
+    )
     context = {
         'category': category,
         'page_obj': page_obj,
@@ -109,27 +98,17 @@ def category_posts(request, category_slug):
     return render(request, 'blog/category.html', context)
 
 
+@condition(etag_func=page_etag)
+@cache_anonymous_page
 def profile(request, username):
     user = get_object_or_404(get_user_model(), username=username)
     is_owner = request.user == user
 
-    if is_owner:
-        posts = user.posts.select_related('category',
-                                          'location',
-                                          'author').all()
-    else:
-        posts = user.posts.select_related('category',
-                                          'location',
-                                          'author').filter(
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True
-        )
-
-    posts = posts.annotate(comment_count=Count('comments')
-                           ).order_by('-pub_date')
+    posts = user.posts.visible_to(request.user).for_feed()
 
-    page_obj = paginate_page(request, posts, posts_per_page=10)
+    page_obj = with_card_versions(
+        paginate_page(request, posts, posts_per_page=10)
+    )
 
     context = {
         'profile': user,
@@ -254,3 +233,38 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_object(self):
         return self.request.user
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.published().for_feed().search(query)
+    page_obj = with_card_versions(
+        SearchPaginator(posts, 10).get_page(request.GET.get('page'))
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'query_prefix': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'blog/search.html', context)
+
+
+def autocomplete_suggestions(request):
+    """Подсказки из индекса в памяти, без запросов к базе."""
+    entries = autocomplete.index.lookup(request.GET.get('q', ''))
+    return JsonResponse({'results': [
+        {'type': entry.kind, 'label': entry.label, 'url': entry.url}
+        for entry in entries
+    ]})
+
+
+def server_timing(request):
+    """Перцентили фаз запроса из памяти процесса, только локально."""
+    if (
+        not settings.SERVER_TIMING
+        or request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS
+    ):
+        raise Http404
+    return JsonResponse(
+        timing.report(), json_dumps_params={'ensure_ascii': False}
+    )
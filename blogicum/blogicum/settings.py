@@ -13,6 +13,18 @@ ALLOWED_HOSTS = []
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'post_images': {
+        'BACKEND': 'blog.storage.ContentAddressedStorage',
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -39,10 +51,34 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if DEBUG:
+    MIDDLEWARE.insert(0, 'blog.middleware.QueryBudgetMiddleware')
+
+# Предельное число SQL-запросов на страницу по имени URL. Считается на
+# холодном кэше: после перезапуска и выхода отложенной публикации страница
+# заново вычисляет ближайшую публикацию и COUNT ленты.
+QUERY_BUDGETS = {
+    'blog:index': 5,
+    'blog:category_posts': 6,
+    'blog:profile': 6,
+    'blog:post_detail': 5,
+    'blog:create_post': 4,
+    'blog:edit_post': 7,
+    'blog:autocomplete': 0,
+    'pages:about': 2,
+    'pages:rules': 2,
+}
+QUERY_BUDGET_RAISE = False
+
+# Фоновый поток, применяющий журнал подсказок к индексу процесса. Без него
+# журнал читает сам запрос подсказок (blog.autocomplete).
+AUTOCOMPLETE_BACKGROUND_SYNC = True
+
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES = [
@@ -61,6 +97,16 @@ TEMPLATES = [
     },
 ]
 
+# Заголовок Server-Timing и перцентили фаз запроса (blog.timing).
+SERVER_TIMING = False
+if SERVER_TIMING:
+    MIDDLEWARE.insert(0, 'blog.timing.ServerTimingMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'blog.timing.TimedDjangoTemplates'
+INTERNAL_IPS = ['127.0.0.1']
+
+# Профили запросов staff с ?profile или заголовком X-Profile.
+PROFILE_DIR = BASE_DIR / 'profiles'
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
@@ -70,6 +116,16 @@ DATABASES = {
     }
 }
 
+# Кэш общий для всех процессов: версии, которые сбрасывают воркер
+# process_images и команды обслуживания, должны доходить до веб-сервера.
+# SQLite и так держит сайт на одной машине, поэтому хватает файлового кэша.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -12,7 +12,7 @@ from blog.utils import paginate_page
 
 
 def home(request):
-    posts_list = Post.objects.filter(is_published=True).order_by('-pub_date')
+    posts_list = Post.objects.published().for_feed()
     page_obj = paginate_page(request, posts_list, posts_per_page=10)
     return render(request, 'pages/home.html', {'page_obj': page_obj})
 
@@ -21,15 +21,7 @@ def home(request):
 def profile(request, username):
     profile_user = get_object_or_404(User, username=username)
 
-    if request.user == profile_user:
-        posts_list = Post.objects.filter(
-            author=profile_user
-        ).order_by('-pub_date')
-    else:
-        posts_list = Post.objects.filter(
-            author=profile_user,
-            is_published=True
-        ).order_by('-pub_date')
+    posts_list = profile_user.posts.visible_to(request.user).for_feed()
 
     page_obj = paginate_page(request, posts_list, posts_per_page=10)
 
@@ -0,0 +1,47 @@
+// Подсказки в шапке: заголовки постов, категории и авторы.
+(function () {
+  const input = document.getElementById('autocomplete-input');
+  const list = document.getElementById('autocomplete-results');
+  if (!input || !list) {
+    return;
+  }
+  let timer = null;
+  let controller = null;
+
+  function render(results) {
+    list.replaceChildren(...results.map(function (result) {
+      const link = document.createElement('a');
+      link.className = 'list-group-item list-group-item-action';
+      link.href = result.url;
+      link.textContent = result.label;
+      return link;
+    }));
+    list.hidden = results.length === 0;
+  }
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      const query = input.value.trim();
+      if (controller) {
+        controller.abort();
+      }
+      if (!query) {
+        render([]);
+        return;
+      }
+      controller = new AbortController();
+      const url = input.dataset.url + '?q=' + encodeURIComponent(query);
+      fetch(url, {signal: controller.signal})
+        .then(function (response) { return response.json(); })
+        .then(function (data) { render(data.results); })
+        .catch(function () {});
+    }, 150);
+  });
+
+  input.addEventListener('keydown', function (event) {
+    if (event.key === 'Enter') {
+      window.location = input.dataset.searchUrl + '?q=' + encodeURIComponent(input.value);
+    }
+  });
+})();
@@ -4,6 +4,7 @@ import time
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
+from urllib.parse import urlsplit
 from typing import (
     Iterable,
     Type,
@@ -18,12 +19,15 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.urls import resolve
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +45,12 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +143,19 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def assert_query_budget(django_assert_max_num_queries):
+    """GET-запрос в пределах бюджета SQL-запросов из QUERY_BUDGETS."""
+
+    def check(client: Client, url: str) -> HttpResponse:
+        view_name = resolve(urlsplit(url).path).view_name
+        budget = settings.QUERY_BUDGETS[view_name]
+        with django_assert_max_num_queries(budget):
+            return client.get(url)
+
+    return check
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
@@ -0,0 +1,181 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog import autocomplete
+from blog.models import AutocompleteChange
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def index(settings, monkeypatch):
+    # Без фонового потока журнал читает запрос подсказок; долгий интервал
+    # оставляет тестам явные вызовы sync().
+    settings.AUTOCOMPLETE_BACKGROUND_SYNC = False
+    monkeypatch.setattr(autocomplete, "AUTOCOMPLETE_SYNC_INTERVAL", 3600)
+    index = autocomplete.PrefixIndex()
+    monkeypatch.setattr(autocomplete, "index", index)
+    return index
+
+
+def _suggest(client, query):
+    response = client.get("/autocomplete/", {"q": query})
+    return [item["label"] for item in json.loads(response.content)["results"]]
+
+
+@pytest.fixture
+def titled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", title="Полёт на Луну", author=user,
+        category=published_category, is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_suggestions_by_word_prefix(client, index, titled_post, mixer):
+    mixer.blend("blog.Post", title="Полёт в черновике", is_published=False)
+    mixer.blend("auth.User", username="полётчик")
+    mixer.blend("blog.Category", title="Полёты", is_published=True)
+    index.sync()
+    assert sorted(_suggest(client, "полёт")) == [
+        "Полёт на Луну", "Полёты", "полётчик"
+    ]
+    assert _suggest(client, "лун") == ["Полёт на Луну"]
+
+
+def test_suggestions_skip_database(
+        client, index, titled_post, django_assert_num_queries
+):
+    # Первый запрос без фонового потока строит индекс.
+    assert _suggest(client, "луну") == ["Полёт на Луну"]
+    with django_assert_num_queries(0):
+        assert _suggest(client, "луну") == ["Полёт на Луну"], (
+            "Убедитесь, что подсказки отдаются из индекса в памяти"
+            " без запросов к базе."
+        )
+
+
+def test_index_follows_writes(
+        client, index, titled_post, django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+):
+    index.sync()
+    with django_capture_on_commit_callbacks(execute=True):
+        titled_post.title = "Полёт на Марс"
+        titled_post.save()
+    with django_assert_num_queries(0):
+        assert _suggest(client, "марс") == ["Полёт на Марс"]
+        assert _suggest(client, "луну") == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        titled_post.category.is_published = False
+        titled_post.category.save()
+    index.sync()
+    assert _suggest(client, "марс") == []
+
+
+def test_scheduled_post_appears_on_time(client, index, titled_post):
+    titled_post.pub_date = timezone.now() + timedelta(hours=1)
+    titled_post.save()
+    index.sync()
+    assert _suggest(client, "луну") == []
+    entry = index._entries[autocomplete.POST, titled_post.pk]
+    assert entry.pub_date > timezone.now()
+
+
+def test_other_process_write_is_applied_as_delta(
+        client, index, titled_post, django_assert_num_queries
+):
+    index.sync()
+    # Запись в другом процессе: до этого индекса доходит только журнал.
+    titled_post.title = "Полёт к Венере"
+    AutocompleteChange.objects.create(
+        kind=autocomplete.POST, object_id=titled_post.pk,
+        label=titled_post.title, pub_date=titled_post.pub_date,
+    )
+    assert _suggest(client, "венер") == []
+    with django_assert_num_queries(1):
+        index.sync()
+    assert _suggest(client, "венер") == ["Полёт к Венере"], (
+        "Убедитесь, что изменения из журнала применяются без перестройки"
+        " индекса."
+    )
+    assert _suggest(client, "луну") == []
+
+
+def test_login_is_not_logged(client, user):
+    logged = AutocompleteChange.objects.count()
+    client.force_login(user)
+    assert AutocompleteChange.objects.count() == logged
+
+
+def test_category_change_is_applied_as_delta(
+        client, index, titled_post, django_assert_num_queries,
+        django_capture_on_commit_callbacks,
+):
+    index.sync()
+    category = titled_post.category
+    # Без колбэков коммита изменения видит только журнал, как в другом
+    # процессе.
+    with django_capture_on_commit_callbacks(execute=False):
+        category.title = "Полёты в космос"
+        category.is_published = False
+        category.save()
+    assert not AutocompleteChange.objects.filter(
+        kind=autocomplete.REBUILD
+    ).exists(), "Убедитесь, что правка категории не перестраивает индекс."
+    with django_assert_num_queries(1):
+        index.sync()
+    assert _suggest(client, "луну") == [], (
+        "Убедитесь, что посты скрытой категории пропадают из подсказок."
+    )
+    assert _suggest(client, "космос") == []
+
+    with django_capture_on_commit_callbacks(execute=False):
+        category.is_published = True
+        category.save()
+    with django_assert_num_queries(1):
+        index.sync()
+    assert _suggest(client, "луну") == ["Полёт на Луну"]
+    assert _suggest(client, "космос") == ["Полёты в космос"]
+
+
+def test_lookup_syncs_without_background_thread(
+        client, index, titled_post, monkeypatch, django_assert_num_queries
+):
+    assert _suggest(client, "луну") == ["Полёт на Луну"]
+    AutocompleteChange.objects.create(
+        kind=autocomplete.POST, object_id=titled_post.pk,
+        label="Полёт к Венере", pub_date=titled_post.pub_date,
+    )
+    assert _suggest(client, "венер") == []
+    monkeypatch.setattr(autocomplete, "AUTOCOMPLETE_SYNC_INTERVAL", 0)
+    with django_assert_num_queries(1):
+        assert _suggest(client, "венер") == ["Полёт к Венере"], (
+            "Убедитесь, что без фонового потока запрос подсказок читает"
+            " журнал после AUTOCOMPLETE_SYNC_INTERVAL."
+        )
+
+
+def test_sync_only_reads_log(index, titled_post, django_assert_num_queries):
+    index.sync()
+    AutocompleteChange.objects.filter(pk__gt=0).update(
+        created_at=timezone.now() - timedelta(days=30)
+    )
+    with django_assert_num_queries(1) as ctx:
+        index.sync()
+    assert ctx.captured_queries[0]["sql"].startswith("SELECT")
+    assert AutocompleteChange.objects.exists(), (
+        "Убедитесь, что синхронизация не чистит журнал."
+    )
+    fresh = AutocompleteChange.objects.create(kind=autocomplete.REBUILD)
+    call_command("prune_autocomplete", stdout=StringIO())
+    assert list(AutocompleteChange.objects.all()) == [fresh], (
+        "Убедитесь, что `prune_autocomplete` удаляет только устаревшие"
+        " записи журнала."
+    )
@@ -0,0 +1,176 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog import schedule
+from blog.cache import FEED_GENERATION, _page_timeout, get_versions
+from blog.constants import FEED_PAGE_CACHE_TIMEOUT
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_post(mixer, user, published_category, published_location):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True,
+        title="Заголовок до правки",
+    )
+
+
+def test_post_card_is_served_from_cache(client, feed_post):
+    assert "Заголовок до правки" in client.get("/").content.decode()
+    type(feed_post).objects.filter(pk=feed_post.pk).update(
+        title="Правка в обход сигналов"
+    )
+    assert "Заголовок до правки" in client.get("/").content.decode(), (
+        "Убедитесь, что карточка поста в ленте берётся из кэша."
+    )
+
+
+def test_post_card_invalidated_by_related_saves(
+        client, mixer, feed_post, published_category
+):
+    client.get("/")
+    published_category.title = "Новая категория"
+    published_category.save()
+    assert "Новая категория" in client.get("/").content.decode(), (
+        "Убедитесь, что изменение категории сбрасывает кэш карточек."
+    )
+    mixer.blend("blog.Comment", post=feed_post)
+    assert "Комментарии (1)" in client.get("/").content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кэш карточки поста."
+    )
+
+
+def test_anonymous_feed_page_is_cached(client, user_client, feed_post):
+    client.get("/")
+    type(feed_post).objects.filter(pk=feed_post.pk).update(is_visible=False)
+    assert "Заголовок до правки" in client.get("/").content.decode(), (
+        "Убедитесь, что лента для анонимных пользователей берётся из кэша."
+    )
+    response = user_client.get("/")
+    assert "Заголовок до правки" not in response.content.decode(), (
+        "Убедитесь, что лента для авторизованных пользователей не кэшируется."
+    )
+
+
+def test_anonymous_profile_cache_invalidated_by_user_save(
+        client, user, feed_post
+):
+    url = f"/profile/{user.username}/"
+    client.get(url)
+    user.first_name = "Переименованный"
+    user.save()
+    assert "Переименованный" in client.get(url).content.decode(), (
+        "Убедитесь, что правка профиля сбрасывает кэш страницы автора."
+    )
+
+
+def test_login_keeps_cached_cards(client, user, feed_post):
+    pairs = [("user", user.pk), FEED_GENERATION]
+    before = get_versions(pairs)
+    client.force_login(user)
+    assert get_versions(pairs) == before, (
+        "Убедитесь, что вход пользователя не сбрасывает кэш карточек"
+        " и ленты."
+    )
+
+
+def test_anonymous_feed_cache_expires_at_next_publication(
+        mixer, user, published_category
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert 0 < _page_timeout() <= 30, (
+        "Убедитесь, что кэш ленты истекает к ближайшей отложенной"
+        " публикации."
+    )
+
+
+@pytest.mark.parametrize("url", ["/", "/posts/{id}/"])
+def test_conditional_get(client, mixer, feed_post, url):
+    url = url.format(id=feed_post.id)
+    response = client.get(url)
+    etag = response.headers.get("ETag")
+    assert etag, "Убедитесь, что страницы ленты и поста отдают ETag."
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.NOT_MODIFIED
+    )
+    mixer.blend("blog.Comment", post=feed_post)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что ETag меняется после нового комментария."
+
+
+def test_conditional_get_after_profile_edit(client, user, feed_post):
+    url = f"/profile/{user.username}/"
+    etag = client.get(url).headers["ETag"]
+    user.first_name = "Переименованный"
+    user.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что ETag профиля меняется после правки пользователя."
+
+
+def test_next_publication_tracker(
+        mixer, user, published_category, another_category,
+        django_assert_num_queries
+):
+    soon = timezone.now() + timedelta(hours=1)
+    later = timezone.now() + timedelta(hours=2)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=later,
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=another_category,
+        is_published=True, pub_date=soon,
+    )
+    with django_assert_num_queries(0):
+        assert schedule.next_publication() == soon
+        assert schedule.next_publication(
+            schedule.CATEGORY, published_category.slug
+        ) == later
+        assert schedule.next_publication(
+            schedule.AUTHOR, user.username
+        ) == soon
+
+    another_category.is_published = False
+    another_category.save()
+    with django_assert_num_queries(0):
+        assert schedule.next_publication() == later, (
+            "Убедитесь, что снятие категории с публикации обновляет"
+            " ближайшую отложенную публикацию."
+        )
+        assert schedule.next_publication(
+            schedule.AUTHOR, user.username
+        ) == later
+
+
+def test_next_publication_heals_after_missed_refresh(
+        mixer, user, published_category, monkeypatch
+):
+    soon = timezone.now() + timedelta(hours=1)
+    schedule.next_publication()
+    # Запись в обход сигналов не пересчитывает расписание.
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    type(post).objects.filter(pk=post.pk).update(pub_date=soon)
+    assert schedule.next_publication() is None
+    timeouts = []
+    monkeypatch.setattr(
+        schedule.cache, "set",
+        lambda key, value, timeout: timeouts.append(timeout),
+    )
+    schedule.refresh(schedule.SITE)
+    assert timeouts == [FEED_PAGE_CACHE_TIMEOUT], (
+        "Убедитесь, что запись расписания без отложенных постов истекает"
+        " не позже кэша страниц ленты."
+    )
@@ -0,0 +1,41 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_create_and_delete(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при создании комментария увеличивается счётчик"
+        " `comment_count` публикации."
+    )
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик"
+        " `comment_count` публикации."
+    )
+
+
+def test_comment_count_follows_cascade(mixer, post_with_published_location):
+    post = post_with_published_location
+    commenter = mixer.blend("auth.User")
+    mixer.cycle(2).blend("blog.Comment", post=post, author=commenter)
+    mixer.blend("blog.Comment", post=post)
+    commenter.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=42)
+    call_command("recount_comments")
+    post.refresh_from_db()
+    assert post.comment_count == 2
@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{i}" for i in range(500))
+
+
+@pytest.fixture
+def long_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, text=LONG_TEXT,
+    )
+
+
+def test_excerpt_is_saved_with_post(long_post):
+    assert long_post.excerpt == " ".join(
+        f"слово{i}" for i in range(10)
+    ) + " …"
+    long_post.text = "Совсем другой текст публикации"
+    long_post.save(update_fields=["text"])
+    long_post.refresh_from_db()
+    assert long_post.excerpt == "Совсем другой текст публикации"
+
+
+def test_feed_does_not_load_post_text(user_client, long_post):
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    content = response.content.decode()
+    assert long_post.excerpt in content
+    assert "слово499" not in content
+    feed_sql = [
+        q["sql"] for q in ctx.captured_queries if "blog_post" in q["sql"]
+    ]
+    assert feed_sql and not any(
+        '"blog_post"."text"' in sql for sql in feed_sql
+    ), "Убедитесь, что запрос ленты не загружает полный текст постов."
+
+
+def test_backfill_excerpts(long_post):
+    type(long_post).objects.filter(pk=long_post.pk).update(excerpt="")
+    call_command("backfill_excerpts")
+    long_post.refresh_from_db()
+    assert long_post.excerpt.endswith(" …")
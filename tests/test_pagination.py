@@ -0,0 +1,152 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.constants import COMMENTS_PER_PAGE, OFFSET_PAGINATION_MAX_PAGE
+from blog.utils import encode_cursor
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+N_PAGES = 8
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    return mixer.cycle(N_PER_PAGE * N_PAGES).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+
+
+def _feed_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def _follow_cursor_pages(client: Client):
+    response = client.get("/")
+    seen = _feed_ids(response)
+    page_obj = response.context["page_obj"]
+    while page_obj.has_next():
+        response = client.get(f"/?{page_obj.next_query}")
+        assert response.status_code == HTTPStatus.OK
+        page_obj = response.context["page_obj"]
+        seen.extend(_feed_ids(response))
+    return seen, page_obj
+
+
+def test_cursor_pages_cover_feed_without_gaps(user_client, feed_posts):
+    seen, last_page = _follow_cursor_pages(user_client)
+    expected = sorted(
+        feed_posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+    assert seen == [post.id for post in expected], (
+        "Убедитесь, что переход по ссылкам «вперёд» обходит всю ленту"
+        " без пропусков и повторов."
+    )
+    assert last_page.number is None
+
+
+def test_cursor_previous_page_returns_same_posts(user_client, feed_posts):
+    def get_page(query):
+        return user_client.get(f"/?{query}").context["page_obj"]
+
+    last_offset = get_page(f"page={OFFSET_PAGINATION_MAX_PAGE}")
+    first = get_page(last_offset.next_query)
+    second = get_page(first.next_query)
+    assert second.previous_query.startswith("cursor=p."), (
+        "Убедитесь, что за порогом номеров страниц ссылка «назад»"
+        " использует курсор."
+    )
+    back = get_page(second.previous_query)
+    assert [post.id for post in back] == [post.id for post in first], (
+        "Убедитесь, что курсор «назад» возвращает ту же страницу."
+    )
+
+
+def test_anonymous_cursor_page(client, feed_posts):
+    ordered = sorted(
+        feed_posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+    start = OFFSET_PAGINATION_MAX_PAGE * N_PER_PAGE
+    cursor = encode_cursor("n", ordered[start - 1])
+    content = client.get(f"/?cursor={cursor}").content.decode()
+    shown = [
+        post.id for post in ordered
+        if f'href="/posts/{post.id}/"' in content
+    ]
+    assert shown == [post.id for post in ordered[start:start + N_PER_PAGE]], (
+        "Убедитесь, что анонимный пользователь листает ленту курсором."
+    )
+
+
+@pytest.mark.parametrize("page", [N_PAGES, 0, -1])
+def test_out_of_range_offset_page_is_not_served(
+        user_client, feed_posts, page
+):
+    response = user_client.get(f"/?page={page}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_last_page_cursor(user_client, feed_posts):
+    response = user_client.get("/?cursor=last")
+    assert response.status_code == HTTPStatus.OK
+    page_obj = response.context["page_obj"]
+    oldest = min(feed_posts, key=lambda post: (post.pub_date, post.id))
+    assert page_obj[-1].id == oldest.id
+    assert not page_obj.has_next()
+
+
+def test_comment_pages(
+        user_client, mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PER_PAGE + 3).blend(
+        "blog.Comment", post=post, author=user
+    )
+    url = f"/posts/{post.id}/"
+    first = user_client.get(url).context["comments"]
+    assert len(first) == COMMENTS_PER_PAGE, (
+        "Убедитесь, что на странице поста выводится не больше"
+        f" {COMMENTS_PER_PAGE} комментариев."
+    )
+    assert first.has_next()
+    second = user_client.get(
+        f"{url}?{first.next_query}"
+    ).context["comments"]
+    assert [c.id for c in first] + [c.id for c in second] == [
+        c.id for c in sorted(comments, key=lambda c: (c.created_at, c.id))
+    ]
+    assert not second.has_next()
+
+
+def test_page_links_are_windowed(user_client, feed_posts):
+    page_obj = user_client.get("/").context["page_obj"]
+    ellipsis = page_obj.paginator.ELLIPSIS
+    links = list(page_obj.page_links)
+    assert links[-1] == ellipsis, (
+        "Убедитесь, что пагинатор не выводит ссылку на каждую страницу."
+    )
+    assert all(
+        link == ellipsis or link <= OFFSET_PAGINATION_MAX_PAGE
+        for link in links
+    )
+
+
+def test_feed_count_is_bounded_and_cached(user_client, feed_posts):
+    page_obj = user_client.get("/").context["page_obj"]
+    assert page_obj.paginator.count == (
+        OFFSET_PAGINATION_MAX_PAGE * N_PER_PAGE + 1
+    ), (
+        "Убедитесь, что COUNT ленты не считает посты дальше страниц,"
+        " доступных по номеру."
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/?page=2")
+    assert not any("COUNT(" in q["sql"] for q in ctx.captured_queries), (
+        "Убедитесь, что число постов ленты берётся из кэша."
+    )
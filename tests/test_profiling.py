@@ -0,0 +1,36 @@
+import pstats
+
+import pytest
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    with override_settings(PROFILE_DIR=tmp_path):
+        yield tmp_path
+
+
+@pytest.mark.parametrize("trigger", [
+    {"path": "/?profile"},
+    {"path": "/", "HTTP_X_PROFILE": "1"},
+])
+def test_staff_request_is_profiled(admin_client, profile_dir, trigger):
+    response = admin_client.get(**trigger)
+    files = list((profile_dir / "blog.index").glob("*.prof"))
+    assert len(files) == 1, (
+        "Убедитесь, что профиль запроса сохраняется в PROFILE_DIR"
+        " в каталог с именем представления."
+    )
+    assert response["X-Profile-File"] == files[0].name
+    assert pstats.Stats(str(files[0])).total_calls > 0
+
+
+def test_profiling_requires_staff(user_client, client, profile_dir):
+    for request_client in (user_client, client):
+        response = request_client.get("/?profile", HTTP_X_PROFILE="1")
+        assert not response.has_header("X-Profile-File")
+    assert not list(profile_dir.iterdir()), (
+        "Убедитесь, что запросы не-staff пользователей не профилируются."
+    )
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from blog.middleware import QueryBudgetExceeded
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_query_budget(
+        mixer, user_client, post_with_published_location, assert_query_budget
+):
+    mixer.cycle(N_PER_PAGE).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+    response = assert_query_budget(
+        user_client, f"/posts/{post_with_published_location.id}/"
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_feed_selects_only_card_columns(
+        mixer, user_client, user, published_category, published_location,
+        django_assert_max_num_queries
+):
+    mixer.cycle(N_PER_PAGE).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True,
+    )
+    # Сессия, пользователь, COUNT для пагинатора и сама лента.
+    with django_assert_max_num_queries(4) as ctx:
+        response = user_client.get("/")
+    assert response.status_code == HTTPStatus.OK
+    feed_sql = ctx.captured_queries[-1]["sql"]
+    for column in (
+        '"auth_user"."password"', '"blog_category"."description"',
+        '"blog_post"."text"',
+    ):
+        assert column not in feed_sql, (
+            f"Убедитесь, что лента не загружает столбец {column}."
+        )
+
+
+@pytest.fixture
+def budget_urls(mixer, user, published_category, published_location):
+    posts = mixer.cycle(N_PER_PAGE + 1).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True,
+    )
+    mixer.cycle(N_PER_PAGE).blend("blog.Comment", post=posts[0])
+    return {
+        "blog:index": "/",
+        "blog:category_posts": f"/category/{published_category.slug}/",
+        "blog:profile": f"/profile/{user.username}/",
+        "blog:post_detail": f"/posts/{posts[0].id}/",
+        "blog:create_post": "/posts/create/",
+        "blog:edit_post": f"/posts/{posts[0].id}/edit/",
+        "pages:about": "/pages/about/",
+        "pages:rules": "/pages/rules/",
+    }
+
+
+@pytest.mark.parametrize("cold_cache", [False, True])
+@pytest.mark.parametrize("client_fixture", ["user_client", "client"])
+def test_pages_within_query_budget(
+        request, client_fixture, cold_cache, budget_urls, assert_query_budget
+):
+    client = request.getfixturevalue(client_fixture)
+    for url in budget_urls.values():
+        if cold_cache:
+            cache.clear()
+        response = assert_query_budget(client, url)
+        assert response.status_code in (HTTPStatus.OK, HTTPStatus.FOUND)
+
+
+def test_budget_middleware_raises_over_budget(user_client, budget_urls):
+    budgets = {"blog:index": 0}
+    with override_settings(QUERY_BUDGETS=budgets, QUERY_BUDGET_RAISE=True):
+        with pytest.raises(QueryBudgetExceeded):
+            user_client.get(budget_urls["blog:index"])
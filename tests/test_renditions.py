@@ -0,0 +1,373 @@
+import importlib.util
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import ExifTags, Image
+
+from blog.cache import get_versions
+from blog.constants import (
+    IMAGE_JOB_MAX_ATTEMPTS,
+    IMAGE_ORPHAN_GRACE,
+    IMAGE_RENDITION_WIDTHS,
+)
+from blog import images
+from blog import storage as storage_module
+from blog.images import rendition_name
+from blog.models import ImageJob, Post
+from blog.storage import post_image_storage
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+def _upload(width, height=None, name="photo.jpg", exif=None):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height or width // 2)).save(
+        buffer, "JPEG", exif=exif or Image.Exif()
+    )
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+def _age(path):
+    """Файл загружен давно: льготный срок после загрузки истёк."""
+    old = time.time() - IMAGE_ORPHAN_GRACE - 1
+    os.utime(path, (old, old))
+
+
+def _process_queue(post=None):
+    call_command(
+        "process_images", once=True, workers=1,
+        stdout=StringIO(), stderr=StringIO(),
+    )
+    if post is not None:
+        post.refresh_from_db()
+
+
+def test_renditions_created_on_upload(
+        post_with_published_location, media_root
+):
+    post = post_with_published_location
+    post.image = _upload(1000)
+    post.save()
+    _process_queue(post)
+    assert post.image_renditions == [640, 960, 1000], (
+        "Убедитесь, что при загрузке изображения создаются копии не шире"
+        " оригинала."
+    )
+    for width in post.image_renditions:
+        path = media_root / rendition_name(post.image.name, width)
+        with Image.open(path) as copy:
+            assert copy.width == width
+
+
+def test_small_image_is_served_as_is(post_with_published_location):
+    post = post_with_published_location
+    post.image = _upload(IMAGE_RENDITION_WIDTHS[0])
+    post.save()
+    _process_queue(post)
+    assert post.image_renditions == []
+    assert post.image_src == post.image.url
+
+
+def test_feed_card_uses_srcset(user_client, post_with_published_location):
+    post = post_with_published_location
+    post.image = _upload(2000)
+    post.save()
+    _process_queue()
+    soup = BeautifulSoup(user_client.get("/").content, "html.parser")
+    [img] = soup.select("article img")
+    assert img["loading"] == "lazy"
+    assert img["src"].endswith(f".{IMAGE_RENDITION_WIDTHS[0]}w.webp")
+    assert [part.split()[1] for part in img["srcset"].split(", ")] == [
+        f"{width}w" for width in IMAGE_RENDITION_WIDTHS
+    ]
+    assert "sizes" in img.attrs
+
+
+def test_backfill_renditions(post_with_published_location, media_root):
+    post = post_with_published_location
+    post.image = _upload(800)
+    post.save()
+    _process_queue()
+    type(post).objects.filter(pk=post.pk).update(image_renditions=[])
+    for copy in Path(media_root).rglob("*.webp"):
+        copy.unlink()
+
+    [version] = get_versions([("post", post.pk)])
+
+    call_command("backfill_renditions", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_renditions == [640, 800]
+    assert (media_root / rendition_name(post.image.name, 640)).exists()
+    assert get_versions([("post", post.pk)]) != [version], (
+        "Убедитесь, что `backfill_renditions` сбрасывает версию карточки"
+        " обработанного поста."
+    )
+
+
+def test_backfill_keeps_image_uploaded_meanwhile(
+        post_with_published_location, monkeypatch
+):
+    post = post_with_published_location
+    post.image = _upload(800)
+    post.save()
+    type(post).objects.filter(pk=post.pk).update(image_renditions=[])
+    replacement = post_image_storage().save("posts/new.jpg", _upload(700))
+    process_image = images.process_image
+
+    def upload_meanwhile(name):
+        result = process_image(name)
+        type(post).objects.filter(pk=post.pk).update(image=replacement)
+        return result
+
+    monkeypatch.setattr(images, "process_image", upload_meanwhile)
+    call_command("backfill_renditions", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image.name == replacement, (
+        "Убедитесь, что `backfill_renditions` не затирает изображение,"
+        " загруженное во время обработки."
+    )
+
+
+def test_job_for_replaced_image_leaves_no_files(
+        post_with_published_location, media_root
+):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Камера"
+    post = post_with_published_location
+    post.image = _upload(1000, exif=exif)
+    post.save()
+    files_before = set(media_root.rglob("*.*"))
+    # Автор сменил картинку, пока задача ждала в очереди.
+    type(post).objects.filter(pk=post.pk).update(image=None)
+    _process_queue()
+    for path in media_root.rglob("*.*"):
+        _age(path)
+    call_command("cleanup_images", stdout=StringIO())
+    assert not set(media_root.rglob("*.*")) - files_before, (
+        "Убедитесь, что очищенный файл и копии изображения, которое пост"
+        " уже не использует, удаляются."
+    )
+
+
+def test_card_shows_original_until_processed(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = _upload(2000)
+    post.save()
+    assert ImageJob.objects.filter(
+        post=post, status=ImageJob.Status.PENDING
+    ).exists(), "Убедитесь, что загрузка ставит изображение в очередь."
+    soup = BeautifulSoup(user_client.get("/").content, "html.parser")
+    [img] = soup.select("article img")
+    assert img["src"] == post.image.url
+    assert "srcset" not in img.attrs
+
+    _process_queue()
+    assert not ImageJob.objects.exists()
+    soup = BeautifulSoup(user_client.get("/").content, "html.parser")
+    [img] = soup.select("article img")
+    assert "srcset" in img.attrs, (
+        "Убедитесь, что после обработки карточка получает новые копии."
+    )
+
+
+def test_failed_job_is_retried_then_marked_failed(
+        post_with_published_location, media_root
+):
+    post = post_with_published_location
+    post.image = _upload(2000)
+    post.save()
+    (media_root / post.image.name).write_bytes(b"not an image")
+
+    for attempt in range(1, IMAGE_JOB_MAX_ATTEMPTS + 1):
+        ImageJob.objects.update(run_after=post.pub_date)
+        _process_queue()
+        job = ImageJob.objects.get()
+        assert job.attempts == attempt
+    assert job.status == ImageJob.Status.FAILED
+    assert "UnidentifiedImageError" in job.error
+
+
+def test_duplicate_upload_is_stored_once(
+        mixer, post_with_published_location, media_root
+):
+    first = post_with_published_location
+    first.image = _upload(1000)
+    first.save()
+    _process_queue(first)
+    stored = len(list(media_root.rglob("*.jpg")))
+
+    second = mixer.blend("blog.Post", image=None)
+    second.image = _upload(1000, name="copy.JPG")
+    second.save()
+    assert second.image.name == first.image.name, (
+        "Убедитесь, что одинаковые файлы хранятся под одним именем."
+    )
+    assert len(list(media_root.rglob("*.jpg"))) == stored
+    assert not ImageJob.objects.exists(), (
+        "Убедитесь, что копии уже загруженного файла не создаются заново."
+    )
+    second.refresh_from_db()
+    assert second.image_renditions == first.image_renditions
+
+
+def test_orphaned_image_is_deleted(
+        mixer, post_with_published_location, media_root,
+        django_capture_on_commit_callbacks,
+):
+    first = post_with_published_location
+    first.image = _upload(1000)
+    first.save()
+    _process_queue(first)
+    second = mixer.blend("blog.Post", image=None)
+    second.image = _upload(1000)
+    second.save()
+    files = [first.image.name] + [
+        rendition_name(first.image.name, width)
+        for width in first.image_renditions
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.image = _upload(800)
+        first.save()
+    assert all((media_root / name).exists() for name in files), (
+        "Убедитесь, что файл, на который ссылается другой пост, не удаляется."
+    )
+
+    for name in files:
+        _age(media_root / name)
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not any((media_root / name).exists() for name in files), (
+        "Убедитесь, что файл без ссылок удаляется вместе с копиями."
+    )
+    assert (media_root / first.image.name).exists()
+
+
+def test_original_is_stripped_of_exif(
+        post_with_published_location, media_root
+):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Камера"
+    exif[ExifTags.Base.Orientation] = 6
+    post = post_with_published_location
+    post.image = _upload(2000, 1000, exif=exif)
+    post.save()
+    uploaded = media_root / post.image.name
+    _process_queue(post)
+    with Image.open(media_root / post.image.name) as original:
+        assert not original.getexif(), (
+            "Убедитесь, что из оригинала изображения убираются метаданные."
+        )
+        assert original.size == (1000, 2000), (
+            "Убедитесь, что поворот из EXIF применяется к оригиналу."
+        )
+    assert uploaded.exists(), (
+        "Убедитесь, что только что загруженный файл не удаляется сразу."
+    )
+    _age(uploaded)
+    call_command("cleanup_images", stdout=StringIO())
+    assert not uploaded.exists(), (
+        "Убедитесь, что `cleanup_images` удаляет файлы без ссылок."
+    )
+    assert (media_root / post.image.name).exists()
+    assert post.image_renditions == [640, 960, 1000]
+    assert (media_root / rendition_name(post.image.name, 640)).exists()
+
+
+def test_card_follows_renditions_written_elsewhere(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = _upload(2000)
+    post.save()
+    user_client.get("/")
+    # Воркер в другом процессе: сброс версий сюда не доходит.
+    type(post).objects.filter(pk=post.pk).update(
+        image_renditions=list(IMAGE_RENDITION_WIDTHS)
+    )
+    soup = BeautifulSoup(user_client.get("/").content, "html.parser")
+    [img] = soup.select("article img")
+    assert "srcset" in img.attrs, (
+        "Убедитесь, что ключ кэша карточки зависит от копий изображения."
+    )
+
+
+def test_reupload_survives_concurrent_release(
+        post_with_published_location, media_root
+):
+    post = post_with_published_location
+    post.image = _upload(1000)
+    post.save()
+    name = post.image.name
+    _age(media_root / name)
+    Post.objects.filter(pk=post.pk).update(image=None)
+    # Та же картинка загружается снова, пост с ней ещё не сохранён.
+    assert post_image_storage().save("posts/again.jpg", _upload(1000)) == name
+    assert not Post.release_image(name)
+    assert (media_root / name).exists(), (
+        "Убедитесь, что файл, только что загруженный повторно, не удаляется."
+    )
+
+
+def test_concurrent_identical_uploads_write_once(media_root, monkeypatch):
+    storage = post_image_storage()
+    writes = []
+    save = FileSystemStorage._save
+
+    def slow_save(self, name, content):
+        writes.append(name)
+        time.sleep(0.2)
+        return save(self, name, content)
+
+    monkeypatch.setattr(FileSystemStorage, "_save", slow_save)
+    content = _upload(700).read()
+    with ThreadPoolExecutor(2) as pool:
+        names = list(pool.map(
+            lambda i: storage.save(
+                f"posts/{i}.jpg", SimpleUploadedFile(f"{i}.jpg", content)
+            ),
+            range(2),
+        ))
+    assert names[0] == names[1]
+    assert len(writes) == 1, (
+        "Убедитесь, что одинаковые загрузки записывают файл один раз."
+    )
+
+
+def test_storage_lock_without_fcntl(monkeypatch, tmp_path):
+    calls = []
+    msvcrt = types.SimpleNamespace(
+        LK_LOCK=1, LK_UNLCK=0,
+        locking=lambda fd, mode, size: calls.append(mode),
+    )
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    monkeypatch.setitem(sys.modules, "msvcrt", msvcrt)
+    spec = importlib.util.spec_from_file_location(
+        "blog._storage_without_fcntl", storage_module.__file__
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with module.ContentAddressedStorage(location=tmp_path).lock():
+        assert calls == [msvcrt.LK_LOCK]
+    assert calls == [msvcrt.LK_LOCK, msvcrt.LK_UNLCK], (
+        "Убедитесь, что хранилище работает без fcntl (Windows)."
+    )
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(**fields):
+        defaults = {
+            "author": user,
+            "text": "Текст публикации.",
+            "category": published_category,
+            "is_published": True,
+            "pub_date": timezone.now() - timedelta(days=1),
+        }
+        return mixer.blend("blog.Post", **{**defaults, **fields})
+    return make
+
+
+def _found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_respects_visibility(client, make_post, mixer):
+    visible = make_post(title="Ракета на Марсе", text="Обычный текст поста.")
+    make_post(title="Ракета в черновиках", is_published=False)
+    make_post(
+        title="Ракета в будущем",
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    make_post(
+        title="Ракета в скрытой категории",
+        category=mixer.blend("blog.Category", is_published=False),
+    )
+    assert _found(client, "ракет") == [visible.id], (
+        "Убедитесь, что поиск находит слова по началу и показывает только"
+        " опубликованные посты."
+    )
+
+
+def test_search_ranks_by_relevance(client, make_post):
+    weak = make_post(title="Заметки", text="Однажды про телескоп.")
+    strong = make_post(
+        title="Телескоп", text="Телескоп, телескоп и снова телескоп."
+    )
+    assert _found(client, "телескоп") == [strong.id, weak.id]
+
+
+def test_search_index_follows_writes(client, make_post, user):
+    post = make_post(title="Старый заголовок")
+    post.title = "Новый заголовок"
+    post.save()
+    assert _found(client, "Старый") == []
+    assert _found(client, "Новый") == [post.id]
+    post.delete()
+    assert _found(client, "Новый") == []
+    [bulk] = Post.objects.bulk_create([Post(
+        title="Массовая вставка", text="Текст массовой вставки.",
+        author=user, category=post.category, is_visible=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )])
+    assert _found(client, "массов") == [bulk.id], (
+        "Убедитесь, что индекс поиска обновляется и без сигналов модели."
+    )
+
+
+def test_search_ignores_fts_syntax(client, make_post):
+    post = make_post(title="Кавычки и скобки")
+    assert _found(client, '"кавычки (скоб') == [post.id]
+    assert _found(client, '*") (') == []
+
+
+def test_admin_search_uses_index(admin_client, make_post):
+    post = make_post(title="Админский поиск")
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.get("/admin/blog/post/", {"q": "админ"})
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context["cl"].result_list) == [post]
+    sql = " ".join(query["sql"] for query in ctx.captured_queries)
+    assert "MATCH" in sql and "LIKE" not in sql
@@ -0,0 +1,63 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from blog import schedule
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _seed(**options):
+    call_command("seed_blog", stdout=StringIO(), **options)
+
+
+def test_seed_blog_creates_consistent_rows():
+    _seed(posts=30, comments_per_post=2, batch_size=7)
+    assert Post.objects.count() == 30
+    assert Comment.objects.count() == 60
+    drifted = Post.objects.annotate(actual=Count("comments")).exclude(
+        comment_count=F("actual")
+    )
+    assert not drifted.exists(), (
+        "Убедитесь, что `seed_blog` выставляет `comment_count` постов."
+    )
+    visible = Q(is_published=True, category__is_published=True)
+    assert not Post.objects.exclude(visible).filter(is_visible=True).exists()
+    assert not Post.objects.filter(visible, is_visible=False).exists()
+    assert not Post.objects.filter(excerpt="").exists()
+    assert Comment.objects.values("created_at").distinct().count() > 1, (
+        "Убедитесь, что `seed_blog` разносит комментарии по времени."
+    )
+
+
+def test_seed_blog_is_deterministic():
+    def snapshot():
+        return list(Post.objects.order_by("title").values_list(
+            "title", "is_published", "comment_count", "excerpt"
+        ))
+
+    _seed(posts=20, seed=7)
+    first = snapshot()
+    Post.objects.all().delete()
+    _seed(posts=20, seed=7)
+    assert snapshot() == first
+
+
+def test_seed_blog_refreshes_schedule():
+    assert schedule.next_publication() is None
+    # При 200 постах доля отложенных даёт хотя бы один с этим сидом.
+    _seed(posts=200, comments_per_post=0)
+    scheduled = Post.objects.filter(pub_date__gt=timezone.now())
+    assert scheduled.exists()
+    first = scheduled.order_by("pub_date").first()
+    assert schedule.next_publication() == first.pub_date, (
+        "Убедитесь, что `seed_blog` пересчитывает ближайшую отложенную"
+        " публикацию."
+    )
+    assert schedule.next_publication(
+        schedule.AUTHOR, first.author.username
+    ) == scheduled.filter(author=first.author).earliest("pub_date").pub_date
@@ -0,0 +1,61 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from blog import timing
+
+pytestmark = [pytest.mark.django_db]
+
+PHASES = ("total", "middleware", "view", "db", "render")
+
+
+@pytest.fixture
+def server_timing():
+    templates = [{
+        **settings.TEMPLATES[0],
+        "BACKEND": "blog.timing.TimedDjangoTemplates",
+    }]
+    timing.reset()
+    with override_settings(
+        SERVER_TIMING=True,
+        MIDDLEWARE=[
+            "blog.timing.ServerTimingMiddleware", *settings.MIDDLEWARE
+        ],
+        TEMPLATES=templates,
+    ):
+        yield
+    timing.reset()
+
+
+def test_server_timing_header(
+        server_timing, user_client, post_with_published_location
+):
+    response = user_client.get("/")
+    assert response.status_code == HTTPStatus.OK
+    header = response.get("Server-Timing", "")
+    names = {metric.split(";")[0] for metric in header.split(", ")}
+    assert set(PHASES) <= names, (
+        "Убедитесь, что заголовок Server-Timing содержит фазы "
+        f"{', '.join(PHASES)}."
+    )
+
+
+def test_server_timing_report(
+        server_timing, user_client, post_with_published_location
+):
+    for _ in range(3):
+        user_client.get("/")
+    response = user_client.get("/server-timing/")
+    assert response.status_code == HTTPStatus.OK
+    stats = json.loads(response.content)["blog:index"]["total"]
+    assert stats["count"] == 3
+    assert stats["p50"] <= stats["p95"] <= stats["p99"]
+
+
+def test_server_timing_disabled_by_default(user_client):
+    assert not user_client.get("/").has_header("Server-Timing")
+    response = user_client.get("/server-timing/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,68 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_visibility_follows_category(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    assert post.is_visible
+
+    published_category.is_published = False
+    published_category.save()
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        "Убедитесь, что при снятии категории с публикации её посты"
+        " пропадают из ленты."
+    )
+
+    published_category.is_published = True
+    published_category.save()
+    post.refresh_from_db()
+    assert post.is_visible
+
+
+def test_post_visibility_follows_post_fields(
+        mixer, user, published_category
+):
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    post = mixer.blend(
+        "blog.Post", author=user, category=hidden_category,
+        is_published=True,
+    )
+    assert not post.is_visible
+
+    post.category = published_category
+    post.save(update_fields=["category"])
+    post.refresh_from_db()
+    assert post.is_visible
+
+    post.is_published = False
+    post.save()
+    post.refresh_from_db()
+    assert not post.is_visible
+
+
+def test_category_delete_hides_posts(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    published_category.delete()
+    post.refresh_from_db()
+    assert post.category is None
+    assert not post.is_visible
+
+
+def test_refresh_visibility_fixes_drift(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    type(post).objects.filter(pk=post.pk).update(is_visible=False)
+    call_command("refresh_visibility")
+    post.refresh_from_db()
+    assert post.is_visible